@@ -0,0 +1,84 @@
+# Items/s for the batch endpoints vs the same work done one call at a time
+# sessions: N x POST /session (one insert_one each) vs POST /sessions/batch (one insert_many)
+# docs:     N x POST /docs-source vs POST /docs-source/batch
+# both run in-process against the Mongo stand-in with the same simulated latency
+# run from the repo root:  python -m benchmarks.bench_batch [--batch-size 100]
+import argparse
+import asyncio
+import logging
+
+import main as api
+from benchmarks.fake_mongo import FakeAsyncClient
+from benchmarks.loadgen import asgi_request, run_load
+from db import Database
+from session_writer import SessionWriter
+from sources import source_registry
+
+DOC_QUERIES = [("python", "default"), ("javascript", "React"), ("java", "Spring"), ("ruby", "Rails")]
+
+
+def session(i):
+    return {"user_id": f"user-{i % 500}", "language": "python", "topic": "Flask"}
+
+
+def doc_query(i):
+    language, topic = DOC_QUERIES[i % len(DOC_QUERIES)]
+    return {"language": language, "topic": topic}
+
+
+SCENARIOS = {
+    # name -> (items per call, request for the i-th call)
+    "sessions single": (1, lambda i, n: ("POST", "/session", session(i))),
+    "sessions batch": (None, lambda i, n: ("POST", "/sessions/batch",
+                                          {"sessions": [session(i * n + j) for j in range(n)]})),
+    "docs-source single": (1, lambda i, n: ("POST", "/docs-source", doc_query(i))),
+    "docs-source batch": (None, lambda i, n: ("POST", "/docs-source/batch",
+                                             {"queries": [doc_query(i * n + j) for j in range(n)]})),
+}
+
+
+async def bench(latency, batch_size, concurrency, duration):
+    source_registry.load()
+    database = Database(FakeAsyncClient(latency))
+    api.app.state.db = database
+    api.app.state.session_writer = SessionWriter(database.sessions, database.progress)
+    headers = {"x-api-key": api.SECRET_KEY or ""}
+
+    results = {}
+    for name, (items, request) in SCENARIOS.items():
+        items = items or batch_size
+
+        async def call(i, request=request):
+            method, path, body = request(i, batch_size)
+            status, _ = await asgi_request(api.app, method, path, headers, body)
+            return status
+
+        stats = await run_load(call, concurrency, duration)
+        stats["items_per_s"] = stats["rps"] * items
+        results[name] = stats
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=100, help="items per batch call (<= MAX_BATCH_SIZE)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration per scenario")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated Mongo round-trip")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    results = asyncio.run(bench(args.latency_ms / 1000, args.batch_size, args.concurrency, args.seconds))
+
+    print(f"{'scenario':<20} {'calls/s':>9} {'items/s':>10} {'p99':>9} {'errors':>7}")
+    for name, stats in results.items():
+        print(f"{name:<20} {stats['rps']:>9.0f} {stats['items_per_s']:>10.0f} "
+              f"{stats['p99_ms']:>7.1f}ms {stats['errors']:>7}")
+    for kind in ("sessions", "docs-source"):
+        single, batch = results[f"{kind} single"], results[f"{kind} batch"]
+        if single["items_per_s"]:
+            print(f"{kind}: batch is {batch['items_per_s'] / single['items_per_s']:.1f}x the single-call item throughput")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Throughput and peak memory on large documentation pages:
+# the old BeautifulSoup chunk_content + clean_data vs the streaming chunker
+# run from the repo root:  python -m benchmarks.bench_chunker [--sections 200 1000 4000]
+import argparse
+import logging
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from benchmarks.docs_server import make_page
+from chunker import stream_chunks
+
+
+def old_chunk_content(html):
+    """chunk_content + clean_data as they were: full tree, two find_all walks"""
+    soup = BeautifulSoup(html, "html.parser")
+    chunks = [f"Header: {h.get_text().strip()}" for h in soup.find_all(["h1", "h2"])]
+    chunks += [p.get_text().strip() for p in soup.find_all("p") if p.get_text().strip()]
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def new_chunk_content(html):
+    return list(stream_chunks(html))
+
+
+def measure(fn, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sections", type=int, nargs="+", default=[200, 1000, 4000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{'page MB':>8} | {'old MB/s':>8} {'old peak MB':>11} {'chunks':>7} | {'new MB/s':>8} {'new peak MB':>11} {'chunks':>7}")
+    for sections in args.sections:
+        html = make_page("Reference", sections=sections)
+        size = len(html) / 1e6
+        old = measure(old_chunk_content, html, args.repeat)
+        new = measure(new_chunk_content, html, args.repeat)
+        print(f"{size:>8.2f} | {size / old[0]:>8.2f} {old[1] / 1e6:>11.1f} {old[2]:>7} | "
+              f"{size / new[0]:>8.2f} {new[1] / 1e6:>11.1f} {new[2]:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Offline crawl of a language_sources-shaped seed list served by local stand-in hosts:
+# old serial requests.get loop vs the concurrent Crawler, then a conditional re-crawl
+# run from the repo root:  python -m benchmarks.bench_crawler [--hosts 4 --pages 15 --delay-ms 50]
+import argparse
+import logging
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+import requests
+
+from benchmarks.docs_server import DocsServer, make_page
+from crawler import FAILED, FETCHED, NOT_MODIFIED, Crawler, seeds_from_sources
+
+
+def serial_fetch(seeds):
+    ok = 0
+    for seed in seeds:
+        try:
+            response = requests.get(seed.url)
+            response.raise_for_status()
+            ok += 1
+        except requests.exceptions.RequestException:
+            pass
+    return ok
+
+
+def timed_crawl(seeds, cache_path, **options):
+    counts = {FETCHED: 0, NOT_MODIFIED: 0, FAILED: 0}
+    start = time.perf_counter()
+    with Crawler(cache_path=cache_path, **options) as crawler:
+        for result in crawler.crawl(seeds):
+            crawler.commit(result)
+            counts[result.status] += 1
+    return time.perf_counter() - start, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=4, help="stand-in documentation sites")
+    parser.add_argument("--pages", type=int, default=15, help="pages per site")
+    parser.add_argument("--delay-ms", type=float, default=50.0, help="server think time per request")
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--flaky", type=int, default=2, help="pages per site that 503 twice before succeeding")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        sources = {}
+        servers = []
+        for h in range(args.hosts):
+            pages = {f"/docs/{p}": make_page(f"Lang{h} topic {p}", sections=5) for p in range(args.pages)}
+            flaky = {f"/docs/{p}": 2 for p in range(args.flaky)}
+            server = stack.enter_context(DocsServer(pages, delay=args.delay_ms / 1000, flaky=flaky))
+            servers.append(server)
+            sources[f"lang{h}"] = {
+                ("default" if p == 0 else f"topic{p}"): f"{server.base_url}/docs/{p}" for p in range(args.pages)
+            }
+        seeds = seeds_from_sources(sources)
+        cache_path = Path(tmp) / "crawl_cache.json"
+
+        start = time.perf_counter()
+        serial_ok = serial_fetch(seeds)
+        serial = time.perf_counter() - start
+        for server in servers:
+            server.flaky = {f"/docs/{p}": 2 for p in range(args.flaky)}
+
+        first, first_counts = timed_crawl(seeds, cache_path, per_host=args.per_host, backoff=0.05)
+        hits_before = sum(s.not_modified for s in servers)
+        again, again_counts = timed_crawl(seeds, cache_path, per_host=args.per_host, backoff=0.05)
+        not_modified = sum(s.not_modified for s in servers) - hits_before
+
+    print(f"{len(seeds)} seeds on {args.hosts} hosts, {args.delay_ms:.0f}ms per response")
+    print(f"serial requests.get   {serial:6.2f}s  ok={serial_ok} (no retries: flaky pages fail)")
+    print(f"Crawler first crawl   {first:6.2f}s  {first_counts}")
+    print(f"Crawler re-crawl      {again:6.2f}s  {again_counts}  ({not_modified} answered 304)")
+
+
+if __name__ == "__main__":
+    main()
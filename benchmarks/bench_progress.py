@@ -0,0 +1,74 @@
+# Latency of "what has this user studied" as their history grows
+# before: stream every session through GET /sessions/{user_id}?stream=true and
+#         aggregate on the client; after: GET /progress/{user_id} (rollups)
+# run from the repo root:  python -m benchmarks.bench_progress [--history 100 1000 10000]
+import argparse
+import asyncio
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+import main as api
+from benchmarks.fake_mongo import FakeAsyncClient
+from benchmarks.loadgen import asgi_request, run_load
+from db import Database
+from progress import progress_updates
+
+USER = "bench-user"
+TOPICS = [("python", "default"), ("python", "Flask"), ("javascript", "React"), ("java", "Spring"), ("ruby", "Rails")]
+
+
+async def seed(database, history):
+    start = datetime(2025, 1, 1)
+    sessions = [
+        {"user_id": USER, "language": language, "topic": topic, "timestamp": start + timedelta(minutes=n)}
+        for n, (language, topic) in ((n, TOPICS[n % len(TOPICS)]) for n in range(history))
+    ]
+    await database.sessions.insert_many(sessions)
+    await database.progress.bulk_write(progress_updates(sessions))
+
+
+async def bench(latency, histories, concurrency, duration):
+    headers = {"x-api-key": api.SECRET_KEY or ""}
+
+    async def client_side(i):
+        status, body = await asgi_request(api.app, "GET", f"/sessions/{USER}?stream=true", headers)
+        Counter((s["language"], s["topic"]) for s in map(json.loads, body.splitlines()))
+        return status
+
+    async def rollup(i):
+        status, _ = await asgi_request(api.app, "GET", f"/progress/{USER}", headers)
+        return status
+
+    results = {}
+    for history in histories:
+        database = Database(FakeAsyncClient(latency))
+        await seed(database, history)
+        api.app.state.db = database
+        results[history] = {
+            "before": await run_load(client_side, concurrency, duration),
+            "after": await run_load(rollup, concurrency, duration),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--history", type=int, nargs="+", default=[100, 1000, 10000], help="sessions per user")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration per measurement")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="simulated Mongo round-trip")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    results = asyncio.run(bench(args.latency_ms / 1000, args.history, args.concurrency, args.seconds))
+
+    print(f"{'sessions':>9} {'before p50':>11} {'before p99':>11} {'after p50':>10} {'after p99':>10}")
+    for history, r in results.items():
+        b, a = r["before"], r["after"]
+        print(f"{history:>9} {b['p50_ms']:>9.1f}ms {b['p99_ms']:>9.1f}ms {a['p50_ms']:>8.2f}ms {a['p99_ms']:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Query latency of the mmap'd BM25 index on a synthetic corpus
+# run from the repo root:  python -m benchmarks.bench_search [--chunks 300000 --queries 2000]
+import argparse
+import itertools
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.loadgen import percentile
+from search_index import SearchIndex, build_index
+
+LANGUAGES = ["javascript", "python", "java", "csharp", "ruby", "html", "css"]
+
+
+def vocabulary(size, rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+
+def synthetic_records(count, vocab, rng, words_per_chunk=80):
+    # Zipf-like term frequencies, like natural-language documentation
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocab))))
+    for i in range(count):
+        language = LANGUAGES[i % len(LANGUAGES)]
+        yield {
+            "language": language,
+            "topic": "default",
+            "url": f"https://docs.example/{language}/{i // 50}",
+            "section": [f"{language} guide", f"part {i % 50}"],
+            "text": " ".join(rng.choices(vocab, cum_weights=cum_weights, k=words_per_chunk)),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=300_000)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(args.seed)
+
+    vocab = vocabulary(args.vocab, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "search.idx"
+        start = time.perf_counter()
+        build_index(synthetic_records(args.chunks, vocab, rng), path)
+        print(f"built {args.chunks} chunks in {time.perf_counter() - start:.1f}s, "
+              f"{path.stat().st_size / 1e6:.0f} MB on disk")
+
+        index = SearchIndex(path)
+        # query terms drawn from the frequent head of the vocabulary as well as the tail
+        head, tail = vocab[:200], vocab[200:]
+        for label, language in (("all languages", None), ("language filter", "python")):
+            timings = []
+            for _ in range(args.queries):
+                terms = [rng.choice(head)] + rng.sample(tail, rng.randint(0, 2))
+                query = " ".join(terms)
+                start = time.perf_counter()
+                index.search(query, language=language, limit=10)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            print(f"{label:<16} p50 {percentile(timings, 50) * 1000:6.2f}ms  "
+                  f"p95 {percentile(timings, 95) * 1000:6.2f}ms  p99 {percentile(timings, 99) * 1000:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
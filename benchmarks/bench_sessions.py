@@ -0,0 +1,114 @@
+# Requests/s and p99 for the session routes: old blocking handlers vs the async data path
+# both run against the in-process Mongo stand-in with the same simulated latency
+# run from the repo root:  python -m benchmarks.bench_sessions [--concurrency 200]
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from fastapi import Body, Depends, FastAPI, HTTPException, Path
+
+import main as api
+from benchmarks.fake_mongo import BlockingFakeCollection, FakeAsyncClient
+from benchmarks.loadgen import asgi_request, run_load
+from db import Database
+from session_writer import SessionWriter
+
+
+def build_blocking_app(latency):
+    """The session routes as they were: plain `def` handlers on a blocking client"""
+    app = FastAPI()
+    sessions = BlockingFakeCollection(latency)
+
+    @app.post("/session")
+    def create_session(data: api.SessionRequest = Body(...), _: None = Depends(api.verify_api_key)):
+        result = sessions.insert_one({
+            "user_id": data.user_id,
+            "language": data.language.lower(),
+            "topic": data.topic,
+            "timestamp": datetime.utcnow(),
+        })
+        return {"session_id": str(result.inserted_id)}
+
+    @app.get("/session/{session_id}")
+    def get_session_by_id(session_id: str = Path(...), _: None = Depends(api.verify_api_key)):
+        session = sessions.find_one({"_id": ObjectId(session_id)})
+        if not session:
+            raise HTTPException(status_code=404)
+        session["_id"] = str(session["_id"])
+        return session
+
+    @app.get("/sessions/{user_id}")
+    def get_sessions_for_user(user_id: str, _: None = Depends(api.verify_api_key)):
+        user_sessions = list(sessions.find({"user_id": user_id}))
+        for session in user_sessions:
+            session["_id"] = str(session["_id"])
+        return {"sessions": user_sessions}
+
+    @app.get("/health")
+    def health_check(_: None = Depends(api.verify_api_key)):
+        sessions.find_one({"_id": None})
+        return {"status": "healthy"}
+
+    return app
+
+
+def build_async_app(latency):
+    database = Database(FakeAsyncClient(latency))
+    api.app.state.db = database
+    api.app.state.session_writer = SessionWriter(database.sessions, database.progress)
+    return api.app
+
+
+async def bench(app, concurrency, duration):
+    headers = {"x-api-key": api.SECRET_KEY or ""}
+    status, body = await asgi_request(app, "POST", "/session", headers,
+                                      {"user_id": "bench-user", "language": "python", "topic": "default"})
+    session_id = json.loads(body)["session_id"]
+
+    # reads first, so the writes below don't grow the collection they scan
+    routes = {
+        "GET /health": lambda i: ("GET", "/health", None),
+        "GET /session/{id}": lambda i: ("GET", f"/session/{session_id}", None),
+        "GET /sessions/{user}": lambda i: ("GET", "/sessions/bench-user", None),
+        "POST /session": lambda i: ("POST", "/session",
+                                    {"user_id": f"user-{i % 500}", "language": "python", "topic": "Flask"}),
+    }
+
+    results = {}
+    for name, request in routes.items():
+        async def call(i, request=request):
+            method, path, body = request(i)
+            status, _ = await asgi_request(app, method, path, headers, body)
+            return status
+        results[name] = await run_load(call, concurrency, duration)
+
+    writer = getattr(app.state, "session_writer", None)
+    if writer is not None:
+        await writer.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration per route")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated Mongo round-trip")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    latency = args.latency_ms / 1000
+
+    before = asyncio.run(bench(build_blocking_app(latency), args.concurrency, args.seconds))
+    after = asyncio.run(bench(build_async_app(latency), args.concurrency, args.seconds))
+
+    print(f"{'route':<22} {'before rps':>11} {'after rps':>10} {'before p99':>11} {'after p99':>10}")
+    for route in before:
+        b, a = before[route], after[route]
+        print(f"{route:<22} {b['rps']:>11.0f} {a['rps']:>10.0f} {b['p99_ms']:>9.1f}ms {a['p99_ms']:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
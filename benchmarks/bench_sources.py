@@ -0,0 +1,73 @@
+# Lookups/sec: old per-request get_language_sources() vs the in-memory registry
+# run from the repo root:  python -m benchmarks.bench_sources [--seconds 2]
+import argparse
+import itertools
+import logging
+import time
+
+from sources import SourceRegistry
+from utils import get_language_sources
+
+# (language, topic) pairs cycled through by both paths - hits, topic fallbacks and misses
+QUERIES = [
+    ("python", "default"),
+    ("JavaScript", "React"),
+    ("java", "Spring"),
+    ("ruby", "Rails"),
+    ("python", "no-such-topic"),
+    ("cobol", "default"),
+]
+
+
+def old_lookup(language, topic):
+    sources = get_language_sources()
+    lang_sources = sources.get(language.lower())
+    if not lang_sources:
+        return None
+    return lang_sources.get(topic) or lang_sources.get("default")
+
+
+def registry_lookup(registry):
+    def lookup(language, topic):
+        return registry.current().resolve(language, topic)
+    return lookup
+
+
+def run(name, lookup, seconds):
+    queries = itertools.cycle(QUERIES)
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        # check the clock every 1000 lookups so timing overhead stays out of the loop
+        for _ in range(1000):
+            lookup(*next(queries))
+        count += 1000
+        if time.perf_counter() >= deadline:
+            break
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{name:<12} {count:>10} lookups in {elapsed:.2f}s  ->  {rate:,.0f} lookups/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent on each path")
+    parser.add_argument("--with-logging", action="store_true",
+                        help="keep the INFO log line the old path writes on every call")
+    args = parser.parse_args()
+
+    if not args.with_logging:
+        logging.disable(logging.INFO)
+
+    registry = SourceRegistry()
+    registry.load()
+
+    old = run("file+json", old_lookup, args.seconds)
+    new = run("registry", registry_lookup(registry), args.seconds)
+    print(f"speedup: {new / old:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Latency and peak memory of GET /sessions/{user_id} as one user's history grows:
+# the old unbounded list vs the first keyset page and the NDJSON stream
+# run from the repo root:  python -m benchmarks.bench_user_sessions [--mongo-uri mongodb://localhost:27017]
+# without --mongo-uri the in-process stand-in is used; it has no real indexes and
+# scans linearly, so only a real mongod shows the server side staying flat (the
+# stream column also counts the benchmark buffering the body it receives)
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from fastapi import Depends, FastAPI
+
+import main as api
+from benchmarks.fake_mongo import FakeAsyncClient
+from benchmarks.loadgen import asgi_request
+from db import Database, get_db
+
+SIZES = [100, 1_000, 10_000, 50_000]
+
+
+def build_unbounded_app(db):
+    """GET /sessions/{user_id} as it was: the whole history in one list"""
+    app = FastAPI()
+    app.state.db = db
+
+    @app.get("/sessions/{user_id}")
+    async def get_sessions_for_user(user_id: str, db: Database = Depends(get_db)):
+        user_sessions = await db.sessions.find({"user_id": user_id}).to_list(None)
+        for session in user_sessions:
+            session["_id"] = str(session["_id"])
+        return {"sessions": user_sessions}
+
+    return app
+
+
+async def seed(db, user_id, count):
+    start = datetime(2025, 1, 1)
+    docs = [
+        {"user_id": user_id, "language": "python", "topic": "Flask", "timestamp": start + timedelta(seconds=i)}
+        for i in range(count)
+    ]
+    for i in range(0, count, 5000):
+        await db.sessions.insert_many(docs[i:i + 5000], ordered=False)
+
+
+async def measure(app, path, headers, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        status, body = await asgi_request(app, "GET", path, headers)
+        timings.append(time.perf_counter() - start)
+        assert status == 200, (status, body[:200])
+
+    tracemalloc.start()
+    await asgi_request(app, "GET", path, headers)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings) * 1000, peak / 1024, len(body)
+
+
+async def run(args):
+    if args.mongo_uri:
+        db = Database.connect(args.mongo_uri)
+        db.db = db.client["lang_tutor_bench"]
+        db.sessions = db.db["sessions"]
+        await db.sessions.drop()
+    else:
+        db = Database(FakeAsyncClient())
+    await db.ensure_indexes()
+
+    api.app.state.db = db
+    old_app = build_unbounded_app(db)
+    headers = {"x-api-key": api.SECRET_KEY or ""}
+
+    print(f"{'sessions':>9} | {'old ms':>8} {'old KiB':>9} | {'page ms':>8} {'page KiB':>9} | {'stream ms':>9} {'stream KiB':>10}")
+    for size in args.sizes:
+        user_id = f"bench-{size}"
+        await seed(db, user_id, size)
+        old = await measure(old_app, f"/sessions/{user_id}", headers, args.repeat)
+        page = await measure(api.app, f"/sessions/{user_id}?limit=50", headers, args.repeat)
+        stream = await measure(api.app, f"/sessions/{user_id}?stream=true", headers, max(1, args.repeat // 5))
+        print(f"{size:>9} | {old[0]:>8.1f} {old[1]:>9.0f} | {page[0]:>8.1f} {page[1]:>9.0f} | {stream[0]:>9.1f} {stream[1]:>10.0f}")
+
+    if args.mongo_uri:
+        await db.db.client.drop_database("lang_tutor_bench")
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mongo-uri", help="benchmark against a real mongod (uses database lang_tutor_bench)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="sessions per user")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
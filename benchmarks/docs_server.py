@@ -0,0 +1,122 @@
+# Local stand-in for documentation sites, so crawler and chunker runs stay offline
+# serves generated MDN-style pages with ETag / Last-Modified, a per-request delay
+# and optional flaky paths that fail a few times before succeeding
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import time
+
+NAV = """
+<header><nav><ul>
+  <li><a href="/">References</a><p>Web technology reference for developers</p></li>
+  <li><a href="/learn">Learn</a><p>Learn web development</p></li>
+  <li><a href="/plus">Plus</a><p>A customized MDN experience</p></li>
+</ul></nav></header>
+"""
+
+FOOTER = """
+<footer>
+  <h2>MDN</h2><p>Your blueprint for a better internet.</p>
+  <h2>Support</h2><p>Get real-time assistance and support</p>
+  <p>This page was last modified by MDN contributors.</p>
+</footer>
+"""
+
+
+def make_page(title, sections=20, paragraphs=5, words=60):
+    """A documentation-like HTML page with nested headings, paragraphs, code and lists"""
+    filler = ("closures prototypes iterators generators promises modules classes scope "
+              "hoisting coercion equality asynchronous event loop garbage collection ").split()
+    parts = [f"<!DOCTYPE html><html><head><title>{title}</title>"
+             "<style>body{font-family:sans-serif}</style><script>var x = '<p>not text</p>';</script>"
+             f"</head><body>{NAV}<main><article><h1>{title}</h1><h2>In this article</h2>"]
+    for s in range(sections):
+        parts.append(f"<section><h2 id='s{s}'>{title} section {s}</h2>")
+        for p in range(paragraphs):
+            text = " ".join(filler[(s * 7 + p * 3 + w) % len(filler)] for w in range(words))
+            parts.append(f"<p>{title} {s}.{p}: <strong>{text}</strong> see <a href='#s{s}'>more</a>.</p>")
+            if p == 2:
+                parts.append(f"<h3>Example {s}</h3><pre><code>const x{s} = {s};</code></pre>")
+                parts.append("<ul><li>first point</li><li>second point</li></ul>")
+        parts.append("</section>")
+    parts.append(f"</article></main>{FOOTER}</body></html>")
+    return "".join(parts).encode()
+
+
+class DocsServer:
+    """ThreadingHTTPServer on 127.0.0.1:<random port>; use as a context manager"""
+
+    def __init__(self, pages=None, delay=0.0, flaky=None):
+        self.pages = dict(pages or {})
+        self.delay = delay
+        self.flaky = dict(flaky or {})  # path -> number of 503s before success
+        self.hits = 0
+        self.not_modified = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.hits += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    self._respond()
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _respond(self):
+                if server.delay:
+                    time.sleep(server.delay)
+                if server.flaky.get(self.path, 0) > 0:
+                    server.flaky[self.path] -= 1
+                    self.send_response(503)
+                    self.send_header("Retry-After", "0")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = server.pages.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", server.last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
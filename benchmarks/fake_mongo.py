@@ -0,0 +1,240 @@
+# In-process stand-in for the slice of the (async) pymongo API the app uses
+# lets the benchmarks run without a mongod; `latency` simulates the network
+# round-trip so the difference between blocking and non-blocking drivers shows
+import asyncio
+import time
+from types import SimpleNamespace
+
+from bson.objectid import ObjectId
+
+_OPERATORS = {
+    "$gt": lambda value, arg: value is not None and value > arg,
+    "$gte": lambda value, arg: value is not None and value >= arg,
+    "$lt": lambda value, arg: value is not None and value < arg,
+    "$lte": lambda value, arg: value is not None and value <= arg,
+    "$in": lambda value, arg: value in arg,
+    "$ne": lambda value, arg: value != arg,
+}
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            value = doc.get(key)
+            if not all(_OPERATORS[op](value, arg) for op, arg in condition.items()):
+                return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+
+_UPDATES = {
+    "$set": lambda current, arg: arg,
+    "$inc": lambda current, arg: (current or 0) + arg,
+    "$min": lambda current, arg: arg if current is None or arg < current else current,
+    "$max": lambda current, arg: arg if current is None or arg > current else current,
+}
+
+
+def apply_update(doc, update):
+    for op, fields in update.items():
+        for key, arg in fields.items():
+            doc[key] = _UPDATES[op](doc.get(key), arg)
+
+
+def project(doc, projection):
+    if not projection:
+        return dict(doc)
+    include = {k for k, v in projection.items() if v}
+    if include:
+        out = {k: doc[k] for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {k: v for k, v in doc.items() if k not in projection}
+
+
+class FakeCursor:
+    def __init__(self, collection, query, projection=None):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = []
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=1):
+        if isinstance(key_or_list, str):
+            key_or_list = [(key_or_list, direction)]
+        self._sort = list(key_or_list)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def _results(self):
+        docs = [d for d in self._collection.docs.values() if matches(d, self._query)]
+        for key, direction in reversed(self._sort):
+            docs.sort(key=lambda d: d.get(key), reverse=direction < 0)
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(d, self._projection) for d in docs]
+
+    async def to_list(self, length=None):
+        await self._collection._io()
+        docs = self._results()
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self._collection._io()
+        for doc in self._results():
+            yield doc
+
+    async def close(self):
+        pass
+
+
+class FakeCollection:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.docs = {}
+        self.indexes = []
+
+    async def _io(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def insert_one(self, doc):
+        await self._io()
+        doc.setdefault("_id", ObjectId())
+        self.docs[doc["_id"]] = doc
+        return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    async def insert_many(self, docs, ordered=True):
+        await self._io()
+        ids = []
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self.docs[doc["_id"]] = doc
+            ids.append(doc["_id"])
+        return SimpleNamespace(inserted_ids=ids, acknowledged=True)
+
+    async def find_one(self, query, projection=None):
+        await self._io()
+        for doc in self.docs.values():
+            if matches(doc, query):
+                return project(doc, projection)
+        return None
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(self, query or {}, projection)
+
+    async def count_documents(self, query):
+        await self._io()
+        return sum(1 for doc in self.docs.values() if matches(doc, query))
+
+    def _update(self, query, update, upsert):
+        for doc in self.docs.values():
+            if matches(doc, query):
+                apply_update(doc, update)
+                return 1, None
+        if not upsert:
+            return 0, None
+        doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        doc["_id"] = ObjectId()
+        apply_update(doc, update)
+        self.docs[doc["_id"]] = doc
+        return 0, doc["_id"]
+
+    async def update_one(self, query, update, upsert=False):
+        await self._io()
+        matched, upserted_id = self._update(query, update, upsert)
+        return SimpleNamespace(matched_count=matched, upserted_id=upserted_id, acknowledged=True)
+
+    async def bulk_write(self, requests, ordered=True):
+        # UpdateOne only - the one kind of bulk operation the app sends
+        await self._io()
+        matched = upserted = 0
+        for request in requests:
+            hit, upserted_id = self._update(request._filter, request._doc, request._upsert)
+            matched += hit
+            upserted += upserted_id is not None
+        return SimpleNamespace(matched_count=matched, upserted_count=upserted, acknowledged=True)
+
+    async def create_index(self, keys, **kwargs):
+        self.indexes.append((keys, kwargs))
+        return kwargs.get("name", "_".join(f"{k}_{d}" for k, d in keys))
+
+
+class FakeDatabase:
+    def __init__(self, latency):
+        self.latency = latency
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self.latency)
+        return self._collections[name]
+
+    async def command(self, name):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return {"ok": 1}
+
+
+class FakeAsyncClient:
+    """Drop-in for AsyncMongoClient: `db.Database(FakeAsyncClient())` works"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._databases = {}
+        self.admin = FakeDatabase(latency)
+
+    def __getitem__(self, name):
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(self.latency)
+        return self._databases[name]
+
+    async def close(self):
+        pass
+
+
+class BlockingFakeCollection:
+    """Synchronous twin of FakeCollection, for the old blocking MongoClient path"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._inner = FakeCollection()
+
+    def _io(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def insert_one(self, doc):
+        self._io()
+        doc.setdefault("_id", ObjectId())
+        self._inner.docs[doc["_id"]] = doc
+        return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    def find_one(self, query, projection=None):
+        self._io()
+        for doc in self._inner.docs.values():
+            if matches(doc, query):
+                return project(doc, projection)
+        return None
+
+    def find(self, query=None, projection=None):
+        self._io()
+        return iter(FakeCursor(self._inner, query or {}, projection)._results())
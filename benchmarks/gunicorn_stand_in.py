@@ -0,0 +1,47 @@
+# gunicorn config used by benchmarks/run.py when no mongod is available
+# every worker swaps the real AsyncMongoClient for the in-process stand-in and
+# seeds it with the same fixed sessions, so reads hit whichever worker answers
+# usage:  gunicorn -c benchmarks/gunicorn_stand_in.py -w 4 -k uvicorn.workers.UvicornWorker main:app
+import os
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+SEED_USER = "bench-user"
+SEED_SESSIONS = 200
+SEED_SESSION_IDS = [str(ObjectId(f"{n + 1:024x}")) for n in range(SEED_SESSIONS)]
+
+
+def seed_documents():
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "_id": ObjectId(session_id),
+            "user_id": SEED_USER,
+            "language": "python",
+            "topic": "Flask" if n % 2 else "default",
+            "timestamp": start + timedelta(minutes=n),
+        }
+        for n, session_id in enumerate(SEED_SESSION_IDS)
+    ]
+
+
+def post_worker_init(worker):
+    # runs after main:app is imported and before uvicorn starts the lifespan
+    from benchmarks.fake_mongo import FakeAsyncClient, apply_update
+    from db import Database
+    from progress import progress_updates
+
+    latency = float(os.getenv("BENCH_MONGO_LATENCY_MS", "1")) / 1000
+
+    def connect(cls, uri, **overrides):
+        database = cls(FakeAsyncClient(latency))
+        for doc in seed_documents():
+            database.sessions.docs[doc["_id"]] = doc
+        for update in progress_updates(seed_documents()):
+            rollup = dict(update._filter, _id=ObjectId())
+            apply_update(rollup, update._doc)
+            database.progress.docs[rollup["_id"]] = rollup
+        return database
+
+    Database.connect = classmethod(connect)
@@ -0,0 +1,256 @@
+# Load-test every API route through the same gunicorn + uvicorn worker setup as startup.sh
+# writes throughput and p50/p95/p99 per route to a JSON file and can compare a
+# run against a stored baseline (exit code 1 when a route regressed)
+#
+# run from the repo root:
+#   python -m benchmarks.run                                   # in-process Mongo stand-in
+#   python -m benchmarks.run --mongo-uri mongodb://localhost:27017
+#   python -m benchmarks.run --output bench_output.json --baseline benchmarks/baseline.json
+#   python -m benchmarks.run --target http://127.0.0.1:8000   # an already running server
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+from dotenv import load_dotenv
+
+from benchmarks.gunicorn_stand_in import SEED_SESSION_IDS, SEED_USER, seed_documents
+from benchmarks.http_client import Connection
+from benchmarks.bench_search import synthetic_records, vocabulary
+from benchmarks.loadgen import run_load
+from progress import progress_updates
+from search_index import build_index
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_DB = "lang_tutor_bench"
+
+DOC_QUERIES = [("python", "default"), ("javascript", "React"), ("java", "Spring"), ("ruby", "Rails")]
+
+# the server gets a synthetic search index over this vocabulary (see build_search_index)
+SEARCH_VOCAB = vocabulary(5000, random.Random(7))
+SEARCH_QUERIES = [quote(" ".join(random.Random(n).sample(SEARCH_VOCAB[:300], 2))) for n in range(100)]
+
+# route -> request for the i-th call; every route in main.py that serves API traffic
+SCENARIOS = {
+    "GET /languages": lambda i: ("GET", "/languages", None),
+    "POST /docs-source": lambda i: ("POST", "/docs-source", dict(zip(("language", "topic"), DOC_QUERIES[i % len(DOC_QUERIES)]))),
+    "GET /docs-source": lambda i: ("GET", "/docs-source?language=%s&topic=%s" % DOC_QUERIES[i % len(DOC_QUERIES)], None),
+    "POST /docs-source/batch": lambda i: ("POST", "/docs-source/batch",
+                                          {"queries": [dict(zip(("language", "topic"), query)) for query in DOC_QUERIES]}),
+    "POST /session": lambda i: ("POST", "/session", {"user_id": f"load-{i % 1000}", "language": "python", "topic": "Flask"}),
+    "POST /sessions/batch": lambda i: ("POST", "/sessions/batch", {"sessions": [
+        {"user_id": f"load-{(i * 10 + n) % 1000}", "language": "python", "topic": "Flask"} for n in range(10)]}),
+    "GET /session/{session_id}": lambda i: ("GET", f"/session/{SEED_SESSION_IDS[i % len(SEED_SESSION_IDS)]}", None),
+    "GET /sessions/{user_id}": lambda i: ("GET", f"/sessions/{SEED_USER}?limit=50", None),
+    "GET /progress/{user_id}": lambda i: ("GET", f"/progress/{SEED_USER}", None),
+    "GET /search": lambda i: ("GET", f"/search?q={SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}&limit=10", None),
+    "GET /health": lambda i: ("GET", "/health", None),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed_mongo(uri):
+    from pymongo import MongoClient
+
+    with MongoClient(uri) as client:
+        sessions = client[BENCH_DB]["sessions"]
+        sessions.drop()
+        sessions.insert_many(seed_documents())
+        progress = client[BENCH_DB]["progress"]
+        progress.drop()
+        progress.bulk_write(progress_updates(seed_documents()))
+
+
+def drop_mongo(uri):
+    from pymongo import MongoClient
+
+    with MongoClient(uri) as client:
+        client.drop_database(BENCH_DB)
+
+
+def build_search_index(path, chunks):
+    build_index(synthetic_records(chunks, SEARCH_VOCAB, random.Random(7)), path)
+
+
+def start_server(args, port, index_path):
+    """gunicorn -w N -k uvicorn.workers.UvicornWorker main:app, as in startup.sh"""
+    env = dict(os.environ, LOG_LEVEL=args.log_level, MONGO_DB_NAME=BENCH_DB, SEARCH_INDEX_PATH=str(index_path))
+    command = [sys.executable, "-m", "gunicorn", "-w", str(args.workers), "-k", "uvicorn.workers.UvicornWorker",
+               "-b", f"127.0.0.1:{port}", "--log-level", "warning"]
+    if args.mongo_uri:
+        env["MONGO_URI"] = args.mongo_uri
+    else:
+        # the stand-in ignores the URI, but /health wants one configured
+        env["MONGO_URI"] = "mongodb://stand-in"
+        env["BENCH_MONGO_LATENCY_MS"] = str(args.stand_in_latency_ms)
+        command += ["-c", str(ROOT / "benchmarks" / "gunicorn_stand_in.py")]
+    return subprocess.Popen(command + ["main:app"], cwd=ROOT, env=env)
+
+
+async def wait_until_ready(host, port, headers, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        connection = Connection(host, port)
+        try:
+            status, _ = await connection.request("GET", "/languages", headers)
+            if status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            await connection.close()
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server on {host}:{port} did not come up within {timeout:.0f}s")
+
+
+async def bench_routes(host, port, headers, routes, concurrency, duration, warmup):
+    connections = asyncio.Queue()
+    for _ in range(concurrency):
+        connections.put_nowait(Connection(host, port))
+
+    results = {}
+    for name in routes:
+        build = SCENARIOS[name]
+
+        async def call(i, build=build):
+            method, path, body = build(i)
+            connection = await connections.get()
+            try:
+                status, _ = await connection.request(method, path, headers, body)
+            finally:
+                connections.put_nowait(connection)
+            return status
+
+        if warmup:
+            await run_load(call, concurrency, warmup)
+        results[name] = await run_load(call, concurrency, duration)
+        stats = results[name]
+        print(f"{name:<28} {stats['rps']:>9.0f} req/s  p50 {stats['p50_ms']:>7.2f}ms  "
+              f"p95 {stats['p95_ms']:>7.2f}ms  p99 {stats['p99_ms']:>7.2f}ms  errors {stats['errors']}")
+
+    while not connections.empty():
+        await connections.get_nowait().close()
+    return results
+
+
+def compare(current, baseline, max_regression):
+    """Print per-route deltas; True when any route lost more than max_regression percent
+    or returned more errors (count or rate) than in the baseline"""
+    regressed = False
+    for key in ("concurrency", "duration", "mongo", "target", "search_chunks"):
+        if current["meta"].get(key) != baseline["meta"].get(key):
+            print(f"warning: {key} differs from the baseline "
+                  f"({current['meta'].get(key)!r} vs {baseline['meta'].get(key)!r})")
+    print(f"\n{'route':<28} {'rps':>16} {'p99':>20} {'errors':>16}")
+    for name, stats in current["routes"].items():
+        base = baseline["routes"].get(name)
+        if not base:
+            print(f"{name:<28} (not in baseline)")
+            continue
+        rps_delta = (stats["rps"] - base["rps"]) / base["rps"] * 100 if base["rps"] else 0.0
+        p99_delta = (stats["p99_ms"] - base["p99_ms"]) / base["p99_ms"] * 100 if base["p99_ms"] else 0.0
+        base_rate = base["errors"] / base["requests"] if base["requests"] else 0.0
+        rate = stats["errors"] / stats["requests"] if stats["requests"] else 0.0
+        more_errors = stats["errors"] > base["errors"] or rate > base_rate
+        bad = rps_delta < -max_regression or p99_delta > max_regression or more_errors
+        regressed |= bad
+        print(f"{name:<28} {rps_delta:>+15.1f}% {p99_delta:>+19.1f}% {base['errors']:>7} -> {stats['errors']:<6}"
+              f"  {'REGRESSION' if bad else 'ok'}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every API route through gunicorn/uvicorn")
+    parser.add_argument("--concurrency", type=int, default=64, help="open connections / virtual users")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds measured per route")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured load per route")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers (startup.sh uses 4)")
+    parser.add_argument("--routes", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--mongo-uri", help="use this mongod (database lang_tutor_bench) instead of the stand-in")
+    parser.add_argument("--stand-in-latency-ms", type=float, default=1.0, help="simulated Mongo round-trip")
+    parser.add_argument("--search-chunks", type=int, default=20000, help="chunks in the synthetic search index")
+    parser.add_argument("--target", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--log-level", default="WARNING", help="LOG_LEVEL for the server")
+    parser.add_argument("--output", default="bench_output.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="percent drop in req/s or rise in p99 that counts as a regression")
+    args = parser.parse_args()
+
+    load_dotenv(ROOT / ".env")
+    headers = {"x-api-key": os.getenv("SECRET_KEY", "")}
+
+    server = None
+    tmp = tempfile.TemporaryDirectory()
+    if args.target:
+        target = urlsplit(args.target)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        if args.mongo_uri:
+            seed_mongo(args.mongo_uri)
+        index_path = Path(tmp.name) / "search.idx"
+        if "GET /search" in args.routes:
+            build_search_index(index_path, args.search_chunks)
+        server = start_server(args, port, index_path)
+
+    try:
+        asyncio.run(wait_until_ready(host, port, headers))
+        routes = asyncio.run(bench_routes(host, port, headers, args.routes, args.concurrency,
+                                          args.duration, args.warmup))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if args.mongo_uri and not args.target:
+            drop_mongo(args.mongo_uri)
+        tmp.cleanup()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "target": args.target or f"gunicorn -w {args.workers} -k uvicorn.workers.UvicornWorker",
+            "mongo": "external" if args.target else ("mongod" if args.mongo_uri else
+                                                     f"stand-in ({args.stand_in_latency_ms}ms)"),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "search_chunks": None if args.target else args.search_chunks,
+        },
+        "routes": routes,
+    }
+    Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
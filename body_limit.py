@@ -0,0 +1,38 @@
+# Request body size cap for selected routes, enforced while the body arrives
+# a declared Content-Length over the limit gets a 413 before anything is read;
+# chunked (or understated) bodies are counted as they are received and cut off
+# with the same 413 as soon as they pass the limit, before FastAPI parses them
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app, max_bytes, paths, detail="Request body too large."):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = frozenset(paths)
+        self.detail = detail
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await JSONResponse({"detail": self.detail}, status_code=413)(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body reading as they are
+                    raise HTTPException(status_code=413, detail=self.detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
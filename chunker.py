@@ -0,0 +1,171 @@
+# Single-pass streaming HTML chunker
+# feeds the page through the incremental stdlib HTMLParser - no tree is built -
+# and yields chunks in document order, each tagged with the heading path of the
+# section it sits in; consecutive text in a section is packed into chunks of
+# at most max_chars so they are ready for indexing/retrieval
+import codecs
+from html.parser import HTMLParser
+from typing import NamedTuple, Tuple
+
+DEFAULT_MAX_CHARS = 1000
+FEED_SIZE = 64 * 1024
+
+HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+BLOCK_TAGS = {"p", "li", "pre", "blockquote", "dd", "dt", "td", "th", "figcaption"}
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "title"}
+
+_HEADING = "heading"
+_TEXT = "text"
+
+
+class Chunk(NamedTuple):
+    section: Tuple[str, ...]
+    text: str
+    heading: bool = False
+
+
+class _BlockParser(HTMLParser):
+    """Turns tags into (kind, level, text) events for headings and text blocks"""
+
+    def __init__(self, events):
+        super().__init__(convert_charrefs=True)
+        self._events = events
+        self._skip = 0
+        self._blocks = []  # open block tags, outermost first
+        self._heading = None
+        self._buf = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in HEADING_LEVELS:
+            self._flush_block()
+            self._heading = HEADING_LEVELS[tag]
+        elif tag in BLOCK_TAGS:
+            if tag == "p" and self._blocks:
+                if self._blocks[-1] == "p":
+                    # <p> can't nest - an open one is implicitly closed
+                    self._blocks.pop()
+                # a paragraph inside a list item, cell... starts a new chunk; the
+                # outer block stays open and its text after the </p> is kept
+                if self._heading is None:
+                    self._flush_block()
+            self._blocks.append(tag)
+            self._buf.append(" ")
+        elif tag == "br":
+            self._buf.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in HEADING_LEVELS and self._heading is not None:
+            text = " ".join("".join(self._buf).split())
+            self._buf = []
+            if text:
+                self._events.append((_HEADING, self._heading, text))
+            self._heading = None
+        elif tag in BLOCK_TAGS and tag in self._blocks:
+            self._buf.append(" ")
+            # also closes anything left open inside it (<li><p>text</li>)
+            closed = []
+            while closed[-1:] != [tag]:
+                closed.append(self._blocks.pop())
+            if (not self._blocks or "p" in closed) and self._heading is None:
+                self._flush_block()
+
+    def handle_data(self, data):
+        if not self._skip and (self._heading is not None or self._blocks):
+            self._buf.append(data)
+
+    def _flush_block(self):
+        text = " ".join("".join(self._buf).split())
+        self._buf = []
+        if text:
+            self._events.append((_TEXT, 0, text))
+
+    def close(self):
+        super().close()
+        self._flush_block()
+
+
+def _pieces(source, encoding):
+    """str/bytes or an iterable of either, as str pieces of about FEED_SIZE"""
+    if isinstance(source, (str, bytes)):
+        data = source
+        source = (data[i:i + FEED_SIZE] for i in range(0, len(data), FEED_SIZE))
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for piece in source:
+        yield decoder.decode(piece) if isinstance(piece, bytes) else piece
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _split(text, max_chars):
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        yield text[:cut]
+        text = text[cut:].lstrip()
+    if text:
+        yield text
+
+
+def stream_chunks(source, max_chars=DEFAULT_MAX_CHARS, encoding="utf-8"):
+    """Yield Chunk objects for an HTML page in one pass, in document order
+
+    Headings come out as their own chunks (heading=True) and open a new
+    section; text blocks are packed up to max_chars (None = one chunk per block).
+    """
+    events = []
+    parser = _BlockParser(events)
+    headings = []  # [(level, text)] from the outermost heading down
+    section = ()
+    pending = []
+    pending_len = 0
+
+    def drain():
+        nonlocal section, pending, pending_len
+        for kind, level, text in events:
+            if kind == _HEADING:
+                if pending:
+                    yield Chunk(section, " ".join(pending))
+                    pending, pending_len = [], 0
+                while headings and headings[-1][0] >= level:
+                    headings.pop()
+                headings.append((level, text))
+                section = tuple(t for _, t in headings)
+                yield Chunk(section, text, heading=True)
+            elif max_chars is None:
+                yield Chunk(section, text)
+            else:
+                for piece in _split(text, max_chars):
+                    if pending and pending_len + 1 + len(piece) > max_chars:
+                        yield Chunk(section, " ".join(pending))
+                        pending, pending_len = [], 0
+                    pending.append(piece)
+                    pending_len += len(piece) + (1 if pending_len else 0)
+        events.clear()
+
+    for piece in _pieces(source, encoding):
+        parser.feed(piece)
+        yield from drain()
+    parser.close()
+    yield from drain()
+    if pending:
+        yield Chunk(section, " ".join(pending))
+
+
+def charset_of(content_type, default="utf-8"):
+    """The charset parameter of a Content-Type header, if any"""
+    for param in (content_type or "").split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "charset" and value:
+            value = value.strip('"\'')
+            try:
+                codecs.lookup(value)
+                return value
+            except LookupError:
+                break
+    return default
@@ -0,0 +1,59 @@
+# Per-page chunk store and corpus assembly
+# scraping.py saves every fetched page's chunks as they are, one file per URL
+# (data/pages/<sha1(url)>.json), so a page that answers 304 on a re-crawl keeps
+# its earlier chunks. Duplicates are only removed when the corpus is assembled:
+# all pages are filtered together in seed order (language_sources.json order),
+# so a chunk several pages share always belongs to the first of them, and it
+# reappears on the next page that has it once that page drops it.
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+from crawler import seeds_from_sources
+from dedup import Deduplicator, fingerprint
+from sources import source_registry
+
+logger = logging.getLogger(__name__)
+
+PAGES_DIR = Path(__file__).parent / "data" / "pages"
+
+
+def default_seeds():
+    return seeds_from_sources(source_registry.load().sources)
+
+
+def page_path(url, pages_dir=PAGES_DIR):
+    return Path(pages_dir) / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+
+def save_page(seed, chunks, pages_dir=PAGES_DIR):
+    for chunk in chunks:
+        chunk["fingerprint"] = fingerprint(chunk["text"])
+    path = page_path(seed.url, pages_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {"language": seed.language, "topic": seed.topic, "url": seed.url, "chunks": chunks}
+    path.write_text(json.dumps(record))
+
+
+def load_pages(seeds, pages_dir=PAGES_DIR):
+    """Stored pages for `seeds`, in seed order; seeds never fetched are skipped"""
+    pages = []
+    for seed in seeds:
+        path = page_path(seed.url, pages_dir)
+        if path.exists():
+            pages.append(json.loads(path.read_text()))
+    return pages
+
+
+def assemble(seeds=None, pages_dir=PAGES_DIR, dedup=None):
+    """Stored pages for `seeds` with exact and near-duplicate chunks removed"""
+    if seeds is None:
+        seeds = default_seeds()
+    dedup = dedup or Deduplicator()
+    pages = []
+    for page in load_pages(seeds, pages_dir):
+        page["chunks"] = dedup.filter_page(page["chunks"])
+        pages.append(page)
+    logger.info("Deduplication: %s", dedup.stats)
+    return pages
@@ -0,0 +1,187 @@
+# Concurrent documentation crawler
+# every URL in language_sources.json is a seed; pages are fetched in parallel
+# over one pooled requests.Session with a per-host concurrency cap, retries
+# with exponential backoff, and conditional GETs (ETag / Last-Modified) so a
+# re-crawl only downloads pages that changed. Validators are only remembered
+# once the caller commit()s a result, i.e. after the page itself was stored.
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import zip_longest
+from pathlib import Path
+from typing import NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = Path(__file__).parent / "data" / "crawl_cache.json"
+USER_AGENT = "lang-tutor-crawler/1.0 (+https://github.com/mycoding98/lang-tutor-backend)"
+
+FETCHED = "fetched"
+NOT_MODIFIED = "not_modified"
+FAILED = "failed"
+
+
+class Seed(NamedTuple):
+    language: str
+    topic: str
+    url: str
+
+
+class CrawlResult(NamedTuple):
+    seed: Seed
+    status: str
+    http_status: Optional[int] = None
+    body: Optional[bytes] = None
+    content_type: Optional[str] = None
+    error: Optional[str] = None
+    validators: Optional[dict] = None
+
+
+def seeds_from_sources(sources):
+    """One Seed per distinct URL in a language_sources.json mapping"""
+    seeds = OrderedDict()
+    for language, topics in sources.items():
+        for topic, url in topics.items():
+            seeds.setdefault(url, Seed(language, topic, url))
+    return list(seeds.values())
+
+
+def interleave_by_host(seeds):
+    """Round-robin seeds across hosts so workers don't all queue on one host's limit"""
+    by_host = defaultdict(list)
+    for seed in seeds:
+        by_host[urlsplit(seed.url).netloc].append(seed)
+    return [seed for group in zip_longest(*by_host.values()) for seed in group if seed is not None]
+
+
+class ValidatorCache:
+    """url -> {etag, last_modified} from previous crawls, persisted as JSON"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = Path(path) if path else None
+        self._entries = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text())
+            except ValueError as e:
+                logger.warning("Ignoring unreadable crawl cache %s: %s", self.path, e)
+
+    def headers_for(self, url):
+        entry = self._entries.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url, validators):
+        with self._lock:
+            if validators and any(validators.values()):
+                self._entries[url] = dict(validators)
+            else:
+                self._entries.pop(url, None)
+
+    def save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with self._lock:
+            tmp.write_text(json.dumps(self._entries, indent=2, sort_keys=True))
+        os.replace(tmp, self.path)
+
+
+class Crawler:
+    def __init__(self, max_workers=16, per_host=4, timeout=15.0, retries=3, backoff=0.5,
+                 cache_path=CACHE_PATH):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.cache = ValidatorCache(cache_path)
+        self._host_slots = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+        self._host_lock = threading.Lock()
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # pool_maxsize matches the per-host cap so connections are always reused
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=per_host, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.cache.save()
+        self.session.close()
+
+    def _slot(self, url):
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            return self._host_slots[host]
+
+    def fetch(self, seed):
+        """Fetch one seed, honouring the per-host limit; never raises"""
+        with self._slot(seed.url):
+            try:
+                response = self.session.get(seed.url, headers=self.cache.headers_for(seed.url),
+                                            timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                logger.warning("Fetching %s failed: %s", seed.url, e)
+                return CrawlResult(seed, FAILED, error=str(e))
+
+        if response.status_code == 304:
+            logger.debug("Unchanged since last crawl: %s", seed.url)
+            return CrawlResult(seed, NOT_MODIFIED, http_status=304)
+        if not response.ok:
+            logger.warning("Fetching %s returned HTTP %d", seed.url, response.status_code)
+            return CrawlResult(seed, FAILED, http_status=response.status_code,
+                               error=f"HTTP {response.status_code}")
+
+        logger.debug("Fetched %s (%d bytes)", seed.url, len(response.content))
+        validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        return CrawlResult(seed, FETCHED, http_status=response.status_code, body=response.content,
+                           content_type=response.headers.get("Content-Type"), validators=validators)
+
+    def commit(self, result):
+        """Remember a fetched page's validators; call once its content has been stored
+
+        Until then the next crawl downloads the page again instead of getting a
+        304 for content that was never saved.
+        """
+        if result.status == FETCHED:
+            self.cache.update(result.seed.url, result.validators)
+
+    def crawl(self, seeds):
+        """Yield a CrawlResult per seed, in completion order"""
+        seeds = interleave_by_host(seeds)
+        counts = defaultdict(int)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawl") as pool:
+            futures = [pool.submit(self.fetch, seed) for seed in seeds]
+            for future in as_completed(futures):
+                result = future.result()
+                counts[result.status] += 1
+                yield result
+        logger.info("Crawled %d seeds: %d fetched, %d unchanged, %d failed", len(seeds),
+                    counts[FETCHED], counts[NOT_MODIFIED], counts[FAILED])
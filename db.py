@@ -0,0 +1,127 @@
+# Async MongoDB access layer
+# one AsyncMongoClient (= one connection pool) per worker process, created and
+# closed by the app lifespan in main.py and handed to routes through get_db()
+import base64
+import json
+import logging
+import os
+from datetime import datetime
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from fastapi import Request
+from pymongo import ASCENDING, DESCENDING, AsyncMongoClient
+
+from metrics import MongoCommandMetrics
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = "lang_tutor"
+
+# newest first; _id breaks ties between sessions created in the same millisecond
+SESSION_SORT = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+SESSION_FIELDS = {"user_id": 1, "language": 1, "topic": 1, "timestamp": 1}
+
+PROGRESS_SORT = [("language", ASCENDING), ("topic", ASCENDING)]
+PROGRESS_FIELDS = {"_id": 0, "language": 1, "topic": 1, "sessions": 1, "first_session": 1, "last_session": 1}
+
+
+def pool_options():
+    """Connection pool settings, tunable per deployment through the environment
+
+    gunicorn runs 4 workers, so the cluster sees up to 4 * MONGO_MAX_POOL_SIZE
+    connections from one host.
+    """
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "5")),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000")),
+        "maxConnecting": int(os.getenv("MONGO_MAX_CONNECTING", "4")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+    }
+
+
+class Database:
+    """The collections the API uses, on top of a single async client"""
+
+    def __init__(self, client, db_name=None):
+        self.client = client
+        self.db = client[db_name or os.getenv("MONGO_DB_NAME", DB_NAME)]
+        self.sessions = self.db["sessions"]
+        self.progress = self.db["progress"]
+
+    @classmethod
+    def connect(cls, uri, **overrides):
+        options = pool_options()
+        options["event_listeners"] = [MongoCommandMetrics()]
+        options.update(overrides)
+        logger.debug("Creating async MongoDB client (pool %s)", options)
+        return cls(AsyncMongoClient(uri, **options))
+
+    async def ensure_indexes(self):
+        """Create the indexes the session queries rely on (no-op when they exist)
+
+        _id lookups (GET /session/{id}) use the built-in _id index; the compound
+        index serves the user filter, the keyset condition and the sort together.
+        The unique progress index is the upsert key for the rollups and serves
+        GET /progress/{user_id} in order.
+        """
+        await self.sessions.create_index(
+            [("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+            name="user_id_timestamp",
+        )
+        await self.progress.create_index(
+            [("user_id", ASCENDING), ("language", ASCENDING), ("topic", ASCENDING)],
+            name="user_id_language_topic",
+            unique=True,
+        )
+
+    def user_sessions(self, user_id, after=None, limit=None):
+        """Cursor over a user's sessions in SESSION_SORT order, starting after `after`
+
+        `after` is the (timestamp, _id) of the last session already returned.
+        """
+        query = {"user_id": user_id}
+        if after is not None:
+            timestamp, last_id = after
+            query["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": last_id}},
+            ]
+        cursor = self.sessions.find(query, SESSION_FIELDS).sort(SESSION_SORT)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+
+    def user_progress(self, user_id):
+        """Cursor over a user's progress rollups, one per language/topic studied"""
+        return self.progress.find({"user_id": user_id}, PROGRESS_FIELDS).sort(PROGRESS_SORT)
+
+    async def ping(self):
+        await self.client.admin.command("ping")
+
+    async def close(self):
+        logger.debug("Closing async MongoDB client")
+        await self.client.close()
+
+
+def encode_cursor(session):
+    """Opaque page cursor pointing just past `session`"""
+    raw = json.dumps([session["timestamp"].isoformat(), str(session["_id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(timestamp, _id) from encode_cursor output; ValueError if it was tampered with"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, last_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), ObjectId(last_id)
+    except (ValueError, TypeError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+async def get_db(request: Request) -> Database:
+    """FastAPI dependency - the Database owned by this worker's lifespan"""
+    return request.app.state.db
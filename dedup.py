@@ -0,0 +1,137 @@
+# Exact and near-duplicate chunk elimination for the scraping pipeline
+# exact duplicates are caught by a hash of the normalised text, near-duplicates
+# (boilerplate with a changed date, a reworded footer...) by 64-bit SimHash
+# over word shingles. It runs over the whole corpus each time it is assembled
+# (see corpus.py), pages in seed order, so a shared chunk always belongs to the
+# same page and comes back once that page stops carrying it.
+import hashlib
+import re
+import time
+from collections import defaultdict
+
+SIMHASH_BITS = 64
+# 4 bands of 16 bits: two fingerprints within 3 bits must agree on one band
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# chunks shorter than this only get exact matching - SimHash is noisy on a few words
+MIN_TOKENS = 8
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def content_hash(text):
+    return hashlib.sha1(normalize(text).encode()).hexdigest()
+
+
+def simhash(tokens, shingle=3):
+    """64-bit SimHash of the token shingles
+
+    Bit b is set when more than half of the shingle hashes have it set. The
+    per-bit counts are kept bit-sliced: planes[i] holds bit i of all 64
+    counters, so adding a hash is a short carry chain of whole-int operations
+    instead of a loop over 64 bits.
+    """
+    if len(tokens) < shingle:
+        shingle = max(1, len(tokens))
+    planes = []
+    count = 0
+    for i in range(len(tokens) - shingle + 1):
+        feature = " ".join(tokens[i:i + shingle]).encode()
+        carry = int.from_bytes(hashlib.blake2b(feature, digest_size=8).digest(), "big")
+        count += 1
+        for level, plane in enumerate(planes):
+            planes[level] = plane ^ carry
+            carry &= plane
+            if not carry:
+                break
+        else:
+            if carry:
+                planes.append(carry)
+
+    # counters > count // 2, compared most significant plane first
+    threshold = count // 2
+    greater, equal = 0, (1 << SIMHASH_BITS) - 1
+    for level in range(len(planes) - 1, -1, -1):
+        plane = planes[level]
+        if threshold >> level & 1:
+            equal &= plane
+        else:
+            greater |= equal & plane
+            equal &= ~plane
+    return greater
+
+
+def fingerprint(text, min_tokens=MIN_TOKENS):
+    """[content hash, SimHash or None] - stored with each chunk, so it is computed once per fetch"""
+    tokens = _WORD.findall(text.lower())
+    return [content_hash(text), simhash(tokens) if len(tokens) >= min_tokens else None]
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class DedupStats:
+    __slots__ = ("seen", "exact", "near", "seconds")
+
+    def __init__(self):
+        self.seen = 0
+        self.exact = 0
+        self.near = 0
+        self.seconds = 0.0
+
+    @property
+    def removed(self):
+        return self.exact + self.near
+
+    def __str__(self):
+        return (f"{self.seen} chunks checked, {self.removed} removed "
+                f"({self.exact} exact, {self.near} near-duplicate) in {self.seconds:.2f}s")
+
+
+class Deduplicator:
+    """Filters chunk records page by page against everything seen before"""
+
+    def __init__(self, max_distance=3, min_tokens=MIN_TOKENS):
+        self.max_distance = max_distance
+        self.min_tokens = min_tokens
+        self.stats = DedupStats()
+        self._exact = set()
+        self._bands = [defaultdict(set) for _ in range(BANDS)]  # band value -> simhashes
+
+    def _index(self, digest, value):
+        self._exact.add(digest)
+        if value is not None:
+            for band in range(BANDS):
+                self._bands[band][value >> band * BAND_BITS & BAND_MASK].add(value)
+
+    def _near(self, value):
+        for band in range(BANDS):
+            for candidate in self._bands[band].get(value >> band * BAND_BITS & BAND_MASK, ()):
+                if hamming(value, candidate) <= self.max_distance:
+                    return True
+        return False
+
+    def filter_page(self, chunks):
+        """Chunks that no earlier page (or earlier chunk of this one) already contributed"""
+        start = time.perf_counter()
+        kept = []
+        for chunk in chunks:
+            self.stats.seen += 1
+            digest, value = chunk.get("fingerprint") or fingerprint(chunk["text"], self.min_tokens)
+            if digest in self._exact:
+                self.stats.exact += 1
+                continue
+            if value is not None and self._near(value):
+                self.stats.near += 1
+                continue
+            kept.append(chunk)
+            self._index(digest, value)
+        self.stats.seconds += time.perf_counter() - start
+        return kept
@@ -0,0 +1,49 @@
+# Process-wide logging setup
+# request code only puts the record on a queue (after the level check); a
+# listener thread does all the formatting - message, traceback, timestamp - and
+# the writing, so neither that work nor slow stderr/stdout sits on the request path
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(process)d %(name)s: %(message)s"
+
+_listener = None
+
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that enqueues the record untouched
+
+    The stock prepare() formats the message and traceback on the calling thread
+    so records can be pickled; the queue here never leaves the process, so the
+    listener formats them instead.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def configure_logging(level=None, fmt=LOG_FORMAT):
+    """Route the root logger through a QueueHandler; level defaults to $LOG_LEVEL (INFO)
+
+    Safe to call more than once - only the first call installs the handlers.
+    """
+    global _listener
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(fmt))
+    log_queue = queue.SimpleQueue()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_RecordQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
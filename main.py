@@ -1,37 +1,91 @@
 import os
+import json
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 from bson.objectid import ObjectId
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Body, Path, Request, Depends, Header
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Body, Path, Query, Request, Depends, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
-from pydantic import BaseModel, Field
+from pymongo.errors import ConnectionFailure, PyMongoError
+from pydantic import BaseModel, Field, ValidationError
 from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
 
-from languages import languages
-from utils import get_language_sources
+from body_limit import BodySizeLimitMiddleware
+from db import Database, decode_cursor, encode_cursor, get_db
+from log_config import configure_logging
+from metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics, start_exporter, stop_exporter
+from response_cache import DocsSourceCache, LanguagesCache, cached_response
+from search_index import search_index
+from session_writer import SessionWriter, WriteQueueFull, get_session_writer
+from sources import source_registry
 
 # Load environment variables from .env
 load_dotenv()
 
-# Setup logging / debugging
-logging.basicConfig(level=logging.DEBUG)
+# Setup logging - queued, level from LOG_LEVEL (INFO unless set)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # From .env
 MONGO_URI = os.getenv("MONGO_URI")
 SECRET_KEY = os.getenv("SECRET_KEY")
 
+# Serialized catalog responses, shared by every request in this worker
+languages_cache = LanguagesCache()
+docs_source_cache = DocsSourceCache(source_registry)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Batch endpoints: items per request and raw body size
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "100"))
+MAX_BATCH_BYTES = int(os.getenv("MAX_BATCH_BYTES", str(256 * 1024)))
+
+# MongoDB startup/shutdown - one async client per worker, owned by the lifespan
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.debug("Starting up MongoDB client")
+    source_registry.load()
+    app.state.db = Database.connect(MONGO_URI)
+    try:
+        await app.state.db.ensure_indexes()
+    except PyMongoError as e:
+        # don't keep the worker from booting - queries still work, just slower
+        logger.error("Could not create MongoDB indexes: %s", e)
+    app.state.session_writer = SessionWriter.from_env(app.state.db.sessions, app.state.db.progress)
+    app.state.session_writer.start()
+    start_exporter()
+    try:
+        yield
+    finally:
+        # flush queued write-behind sessions before the client goes away
+        await app.state.session_writer.close()
+        stop_exporter()
+        logger.debug("Shutting down MongoDB client")
+        await app.state.db.close()
+
 app = FastAPI(
     title="Language Tutor API",
     description="An API to manage language tutoring sessions and documentation sources.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Cap the batch bodies while they are received, before they are parsed
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=MAX_BATCH_BYTES,
+    paths=("/sessions/batch", "/docs-source/batch"),
+    detail=f"That batch is too large. Send at most {MAX_BATCH_BYTES} bytes per request.",
+)
+
+# Per-route latency / in-flight metrics, served on /metrics
+app.add_middleware(MetricsMiddleware)
+
 # CORS setup – allow all for now, lock it down later
 app.add_middleware(
     CORSMiddleware,
@@ -42,14 +96,14 @@ app.add_middleware(
 )
 
 # API key check using header
-def verify_api_key(x_api_key: str = Header(...)):
+async def verify_api_key(x_api_key: str = Header(...)):
     if x_api_key != SECRET_KEY:
         raise HTTPException(status_code=401, detail="API key is missing or invalid.")
 
 # Error handler for general exceptions
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled error: {exc}")
+    logger.error("Unhandled error: %s", exc)
     return JSONResponse(
         status_code=HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Something went wrong on our end. Please try again later."},
@@ -58,7 +112,7 @@ async def global_exception_handler(request: Request, exc: Exception):
 # Error handler for validation issues 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    logger.warning(f"Validation error: {exc}")
+    logger.warning("Validation error: %s", exc)
     return JSONResponse(
         status_code=422,
         content={"detail": "Invalid input. Please check the data you're sending and try again.", "errors": exc.errors()}
@@ -74,117 +128,251 @@ class SessionRequest(BaseModel):
     language: str = Field(..., description="Language the user is learning")
     topic: str = Field(default="default", description="Topic selected for the session")
 
-# Ping for supported languages
+class DocBatchRequest(BaseModel):
+    queries: List[DocRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Language/topic pairs to resolve")
+
+class SessionBatchRequest(BaseModel):
+    # validated one by one in the route, so a bad item fails on its own
+    sessions: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Sessions to create")
+
+# Ping for supported languages (pre-serialized, ETag / 304 aware)
 @app.get("/languages", summary="Get supported languages", response_description="List of supported languages")
-def get_languages(_: None = Depends(verify_api_key)):
+async def get_languages(request: Request, _: None = Depends(verify_api_key)):
     logger.debug("Fetching supported languages")
-    return {"languages": languages}
+    return cached_response(request, languages_cache.get())
 
 # Get docs URL based on language and topic
-@app.post("/docs-source", summary="Get documentation URL")
-def get_doc_source(data: DocRequest = Body(...), _: None = Depends(verify_api_key)):
-    logger.debug(f"Received data: {data.dict()}")
-    sources = get_language_sources()
-    lang_sources = sources.get(data.language.lower())
+def resolve_doc_source(request: Request, language: str, topic: str):
+    logger.debug("Resolving docs for language=%s topic=%s", language, topic)
+    known, cached = docs_source_cache.resolve(language, topic)
 
-    if not lang_sources:
-        logger.warning(f"Language {data.language} not found")
-        raise HTTPException(status_code=404, detail=f"No documentation found for '{data.language}'.")
+    if not known:
+        logger.warning("Language %s not found", language)
+        raise HTTPException(status_code=404, detail=f"No documentation found for '{language}'.")
 
-    url = lang_sources.get(data.topic) or lang_sources.get("default")
+    if cached is None:
+        logger.warning("No documentation found for topic %s", topic)
+        raise HTTPException(status_code=404, detail=f"No documentation found for topic '{topic}'.")
 
-    if not url:
-        logger.warning(f"No documentation found for topic {data.topic}")
-        raise HTTPException(status_code=404, detail=f"No documentation found for topic '{data.topic}'.")
+    return cached_response(request, cached)
 
-    logger.info(f"Returning docs URL: {url}")
-    return {"url": url}
+@app.post("/docs-source", summary="Get documentation URL")
+async def get_doc_source(request: Request, data: DocRequest = Body(...), _: None = Depends(verify_api_key)):
+    return resolve_doc_source(request, data.language, data.topic)
+
+# Resolve many language/topic pairs at once, all against the same source snapshot
+@app.post("/docs-source/batch", summary="Get documentation URLs in bulk")
+async def get_doc_sources(data: DocBatchRequest = Body(...), _: None = Depends(verify_api_key)):
+    logger.debug("Resolving %d docs queries", len(data.queries))
+    snapshot = source_registry.current()
+
+    results = []
+    for query in data.queries:
+        result = {"language": query.language, "topic": query.topic}
+        if not snapshot.topics_for(query.language):
+            result["error"] = f"No documentation found for '{query.language}'."
+        else:
+            url = snapshot.resolve(query.language, query.topic)
+            if url:
+                result["url"] = url
+            else:
+                result["error"] = f"No documentation found for topic '{query.topic}'."
+        results.append(result)
+    return {"results": results}
+
+# Same lookup as a GET, so browsers and the CDN can cache it
+@app.get("/docs-source", summary="Get documentation URL (cacheable)")
+async def get_doc_source_cached(
+    request: Request,
+    language: str = Query(..., description="The programming language (e.g., python, javascript)"),
+    topic: str = Query("default", description="The specific topic within the language"),
+    _: None = Depends(verify_api_key),
+):
+    return resolve_doc_source(request, language, topic)
+
+# Prometheus metrics, merged across workers when METRICS_DIR is set
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+# Full-text search over the scraped documentation chunks (BM25)
+@app.get("/search", summary="Search the documentation")
+def search_docs(
+    q: str = Query(..., min_length=1, max_length=200, description="Free-text query"),
+    language: Optional[str] = Query(None, description="Only return chunks for this language"),
+    limit: int = Query(10, ge=1, le=50, description="Number of results"),
+    _: None = Depends(verify_api_key),
+):
+    logger.debug("Searching for %r (language=%s)", q, language)
+    index = search_index.current()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Search isn't available yet. Please try again later.")
+
+    hits = index.search(q, language=language, limit=limit)
+    return {
+        "results": [
+            {
+                "score": round(score, 4),
+                "language": record["language"],
+                "topic": record["topic"],
+                "url": record["url"],
+                "section": record["section"],
+                "text": record["text"],
+            }
+            for score, record in hits
+        ]
+    }
 
 # Health check (pings Mongo)
 @app.get("/health", summary="Health check")
-def health_check(_: None = Depends(verify_api_key)):
+async def health_check(db: Database = Depends(get_db), _: None = Depends(verify_api_key)):
     logger.debug("Health check: checking MongoDB connection")
     if not MONGO_URI:
         raise HTTPException(status_code=500, detail="Missing MongoDB URI in environment configuration.")
 
     try:
-        mongo_client.admin.command("ping")
+        await db.ping()
     except ConnectionFailure as e:
-        logger.error(f"Mongo ping failed: {str(e)}")
+        logger.error("Mongo ping failed: %s", e)
         raise HTTPException(status_code=500, detail="Database connection failed. Please try again later.")
 
-    logger.info("MongoDB connection successful")
+    logger.debug("MongoDB connection successful")
     return {"status": "healthy"}
 
 # Save a user session to Mongo
+def session_document(data: SessionRequest):
+    return {
+        "user_id": data.user_id,
+        "language": data.language.lower(),
+        "topic": data.topic,
+        "timestamp": datetime.utcnow()
+    }
+
 @app.post("/session", summary="Create a learning session")
-def create_session(data: SessionRequest = Body(...), _: None = Depends(verify_api_key)):
+async def create_session(data: SessionRequest = Body(...), writer: SessionWriter = Depends(get_session_writer), _: None = Depends(verify_api_key)):
     try:
-        logger.debug(f"Creating session for user {data.user_id} in {data.language} with topic {data.topic}")
-
-        db = mongo_client["lang_tutor"]
-        sessions = db["sessions"]
-
-        session_data = {
-            "user_id": data.user_id,
-            "language": data.language.lower(),
-            "topic": data.topic,
-            "timestamp": datetime.utcnow()
-        }
+        logger.debug("Creating session for user %s in %s with topic %s", data.user_id, data.language, data.topic)
 
-        result = sessions.insert_one(session_data)
+        session_id = await writer.insert(session_document(data))
 
-        logger.info(f"Session created successfully with ID: {result.inserted_id}")
+        logger.debug("Session created successfully with ID: %s", session_id)
 
         return {
-            "session_id": str(result.inserted_id),
-            "message": f"Your session was created successfully! Session ID: {result.inserted_id}.",
+            "session_id": str(session_id),
+            "message": f"Your session was created successfully! Session ID: {session_id}.",
             "details": "You can now continue learning the topic you've selected. Keep track of your sessions for better progress."
         }
+    except WriteQueueFull as e:
+        logger.warning("Rejecting session for user %s: %s", data.user_id, e)
+        raise HTTPException(status_code=503, detail="We're busy saving sessions right now. Please try again shortly.", headers={"Retry-After": "1"})
     except Exception as e:
-        logger.error(f"Error creating session for user {data.user_id}: {str(e)}")
+        logger.error("Error creating session for user %s: %s", data.user_id, e)
         raise HTTPException(status_code=500, detail="An error occurred while creating your session. Please try again.")
 
+# Save many sessions with a single write; every item gets its own result
+@app.post("/sessions/batch", summary="Create learning sessions in bulk")
+async def create_sessions(
+    data: SessionBatchRequest = Body(...),
+    writer: SessionWriter = Depends(get_session_writer),
+    _: None = Depends(verify_api_key),
+):
+    logger.debug("Creating %d sessions in one batch", len(data.sessions))
+
+    results = [None] * len(data.sessions)
+    docs, positions = [], []
+    for index, item in enumerate(data.sessions):
+        try:
+            session = SessionRequest.model_validate(item)
+        except ValidationError as e:
+            errors = [{"loc": err["loc"], "msg": err["msg"], "type": err["type"]} for err in e.errors()]
+            results[index] = {"index": index, "status": "invalid", "errors": errors}
+            continue
+        docs.append(session_document(session))
+        positions.append(index)
+
+    if docs:
+        try:
+            written = await writer.insert_many(docs)
+        except Exception as e:
+            logger.error("Error creating a batch of %d sessions: %s", len(docs), e)
+            raise HTTPException(status_code=500, detail="An error occurred while creating your sessions. Please try again.")
+
+        for index, (session_id, error) in zip(positions, written):
+            if error is None:
+                results[index] = {"index": index, "status": "created", "session_id": str(session_id)}
+            else:
+                logger.warning("Session %d of batch not written: %s", index, error)
+                results[index] = {"index": index, "status": "failed", "error": "This session could not be saved. Please try again."}
+
+    created = sum(result["status"] == "created" for result in results)
+    logger.debug("Batch created %d of %d sessions", created, len(results))
+    return {"created": created, "failed": len(results) - created, "results": results}
+
 # Get session by ID
 @app.get("/session/{session_id}", summary="Get session by ID")
-def get_session_by_id(session_id: str = Path(...), _: None = Depends(verify_api_key)):
-    logger.debug(f"Fetching session by ID: {session_id}")
+async def get_session_by_id(session_id: str = Path(...), db: Database = Depends(get_db), _: None = Depends(verify_api_key)):
+    logger.debug("Fetching session by ID: %s", session_id)
 
-    db = mongo_client["lang_tutor"]
-    sessions = db["sessions"]
-    session = sessions.find_one({"_id": ObjectId(session_id)})
+    session = await db.sessions.find_one({"_id": ObjectId(session_id)})
 
     if not session:
-        logger.warning(f"Session with ID {session_id} not found")
+        logger.warning("Session with ID %s not found", session_id)
         raise HTTPException(status_code=404, detail="We couldn't find that session. Please check the ID and try again.")
 
     session["_id"] = str(session["_id"])
-    logger.info(f"Returning session: {session}")
     return session
 
-# Get all sessions for a user
+# What a user has studied, how often and when - read from the progress rollups,
+# so the cost doesn't grow with the number of sessions
+@app.get("/progress/{user_id}", summary="Get a user's learning progress")
+async def get_progress_for_user(user_id: str, db: Database = Depends(get_db), _: None = Depends(verify_api_key)):
+    logger.debug("Fetching progress for user %s", user_id)
+
+    topics = await db.user_progress(user_id).to_list(None)
+
+    return {
+        "user_id": user_id,
+        "total_sessions": sum(topic["sessions"] for topic in topics),
+        "first_session": min((topic["first_session"] for topic in topics), default=None),
+        "last_session": max((topic["last_session"] for topic in topics), default=None),
+        "topics": topics,
+    }
+
+# Get a user's sessions, newest first - one page at a time or streamed as NDJSON
 @app.get("/sessions/{user_id}", summary="Get all sessions for a user")
-def get_sessions_for_user(user_id: str, _: None = Depends(verify_api_key)):
-    logger.debug(f"Fetching sessions for user {user_id}")
+async def get_sessions_for_user(
+    user_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Sessions per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: bool = Query(False, description="Stream every remaining session as NDJSON instead of one page"),
+    db: Database = Depends(get_db),
+    _: None = Depends(verify_api_key),
+):
+    logger.debug("Fetching sessions for user %s", user_id)
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="That page cursor is invalid. Start again from the first page.")
+
+    if stream:
+        return StreamingResponse(stream_sessions(db.user_sessions(user_id, after)), media_type="application/x-ndjson")
 
-    db = mongo_client["lang_tutor"]
-    sessions = db["sessions"]
-    user_sessions = list(sessions.find({"user_id": user_id}))
+    user_sessions = await db.user_sessions(user_id, after, limit).to_list(limit)
+    next_cursor = encode_cursor(user_sessions[-1]) if len(user_sessions) == limit else None
 
     for session in user_sessions:
         session["_id"] = str(session["_id"])
 
-    logger.info(f"Found {len(user_sessions)} sessions for user {user_id}")
-    return {"sessions": user_sessions}
+    logger.debug("Found %d sessions for user %s", len(user_sessions), user_id)
+    return {"sessions": user_sessions, "next_cursor": next_cursor}
 
-# MongoDB startup/shutdown
-@app.on_event("startup")
-def startup_db_client():
-    global mongo_client
-    logger.debug("Starting up MongoDB client")
-    mongo_client = MongoClient(MONGO_URI)
-
-@app.on_event("shutdown")
-def shutdown_db_client():
-    logger.debug("Shutting down MongoDB client")
-    mongo_client.close()
+async def stream_sessions(cursor):
+    # one line per document as the driver hands over each batch - nothing is collected
+    try:
+        async for session in cursor:
+            session["_id"] = str(session["_id"])
+            session["timestamp"] = session["timestamp"].isoformat()
+            yield json.dumps(session) + "\n"
+    finally:
+        await cursor.close()
@@ -0,0 +1,249 @@
+# Request and MongoDB metrics in Prometheus text format
+# each gunicorn worker counts in memory. With METRICS_DIR set (startup.sh does),
+# every worker also writes a snapshot to <METRICS_DIR>/<pid>.json about once a
+# second, and /metrics - whichever worker answers it - merges all of them, so one
+# scrape of the shared port sees the whole server. Histograms of workers that
+# have exited stay in the sum (totals never go backwards); their gauges are
+# dropped. Without METRICS_DIR, /metrics only reports the worker that answered.
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_DIR = os.getenv("METRICS_DIR")
+EXPORT_INTERVAL = float(os.getenv("METRICS_EXPORT_INTERVAL", "1.0"))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    @staticmethod
+    def merge(total, series, live):
+        # histograms are cumulative, so exited workers keep counting
+        return series if total is None else [a + b for a, b in zip(total, series)]
+
+    def render(self, series_by_key):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(series_by_key.items()):
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                le = _labels(self.labelnames + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{le} {count}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_count{labels} {series[-2]}")
+            lines.append(f"{self.name}_sum{labels} {series[-1]:.6f}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels):
+        self.inc(*labels, amount=-1)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(total, value, live):
+        # a worker that died mid-request would otherwise leave its in-flight count behind
+        if not live:
+            return total
+        return value if total is None else total + value
+
+    def render(self, values_by_key):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        lines += [f"{self.name}{_labels(self.labelnames, key)} {value}"
+                  for key, value in sorted(values_by_key.items()) if value is not None]
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time spent handling a request, by route template.",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled.", ("method",))
+MONGO_LATENCY = Histogram(
+    "mongodb_command_duration_seconds", "Round-trip time of MongoDB commands as seen by the driver.",
+    ("command", "outcome"),
+)
+METRICS = [REQUEST_LATENCY, REQUESTS_IN_FLIGHT, MONGO_LATENCY]
+
+
+def _snapshot():
+    return {metric.name: [[list(key), value] for key, value in metric.snapshot().items()] for metric in METRICS}
+
+
+def export_snapshot():
+    """Write this worker's numbers to METRICS_DIR (atomically, for concurrent readers)"""
+    directory = Path(METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(_snapshot()))
+    os.replace(tmp, path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _worker_snapshots():
+    """(pid, snapshot) for every worker that has exported, this one freshly"""
+    export_snapshot()
+    for path in Path(METRICS_DIR).glob("*.json"):
+        try:
+            yield int(path.stem), json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # removed or replaced while listing
+
+
+def render_metrics():
+    if not METRICS_DIR:
+        return "\n".join(line for metric in METRICS for line in metric.render(metric.snapshot())) + "\n"
+
+    merged = {metric.name: {} for metric in METRICS}
+    by_name = {metric.name: metric for metric in METRICS}
+    for pid, snapshot in _worker_snapshots():
+        live = _alive(pid)
+        for name, entries in snapshot.items():
+            metric = by_name.get(name)
+            if metric is None:
+                continue
+            totals = merged[name]
+            for key, value in entries:
+                key = tuple(key)
+                totals[key] = metric.merge(totals.get(key), value, live)
+    return "\n".join(line for metric in METRICS for line in metric.render(merged[metric.name])) + "\n"
+
+
+class _Exporter(threading.Thread):
+    def __init__(self, interval):
+        super().__init__(name="metrics-export", daemon=True)
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                export_snapshot()
+            except OSError:
+                pass  # next round tries again; /metrics also exports on demand
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        export_snapshot()
+
+
+_exporter = None
+
+
+def start_exporter():
+    """Start this worker's periodic snapshot writer; no-op without METRICS_DIR"""
+    global _exporter
+    if METRICS_DIR and _exporter is None:
+        _exporter = _Exporter(EXPORT_INTERVAL)
+        _exporter.start()
+
+
+def stop_exporter():
+    global _exporter
+    if _exporter is not None:
+        _exporter.stop()
+        _exporter = None
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware (no BaseHTTPMiddleware buffering, streaming still streams)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(method)
+            # the router stores the matched route in the scope; label by its template, not the raw path
+            route = scope.get("route")
+            template = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method, template, f"{status // 100}xx")
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener feeding MONGO_LATENCY; pass it as an event listener to the client"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, event.command_name, "ok")
+
+    def failed(self, event):
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, event.command_name, "error")
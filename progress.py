@@ -0,0 +1,112 @@
+# Per-user learning progress rollups
+# one `progress` document per (user_id, language, topic) with the session count
+# and the first/last session timestamps. SessionWriter keeps them current with
+# upserts ($inc / $min / $max) after every session write, so GET /progress/{user_id}
+# reads a handful of rollups through the unique index instead of a user's whole
+# history. `python progress.py backfill` (re)builds them from `sessions`.
+#
+# usage:  python progress.py backfill
+import argparse
+import asyncio
+import logging
+import os
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from db import Database
+from log_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY = ("user_id", "language", "topic")
+
+
+def progress_updates(sessions):
+    """Upserts folding `sessions` into their rollups, one per (user, language, topic)
+
+    Sessions for the same key are combined first, so a flushed batch of 500
+    sessions from one user costs a single update.
+    """
+    rollups = {}
+    for session in sessions:
+        key = tuple(session[field] for field in PROGRESS_KEY)
+        timestamp = session["timestamp"]
+        count, first, last = rollups.get(key, (0, timestamp, timestamp))
+        rollups[key] = (count + 1, min(first, timestamp), max(last, timestamp))
+
+    return [
+        UpdateOne(
+            dict(zip(PROGRESS_KEY, key)),
+            {"$inc": {"sessions": count}, "$min": {"first_session": first}, "$max": {"last_session": last}},
+            upsert=True,
+        )
+        for key, (count, first, last) in rollups.items()
+    ]
+
+
+def backfill_pipeline(into="progress"):
+    """Aggregation that rebuilds every rollup from the sessions collection
+
+    Matched rollups get their values replaced, not added to, so the job can be
+    re-run to repair drift. Sessions written while it runs may be counted twice
+    or not at all; run it before the rollup-maintaining release takes traffic.
+    """
+    return [
+        {"$group": {
+            "_id": {field: f"${field}" for field in PROGRESS_KEY},
+            "sessions": {"$sum": 1},
+            "first_session": {"$min": "$timestamp"},
+            "last_session": {"$max": "$timestamp"},
+        }},
+        {"$project": {
+            "_id": 0,
+            **{field: f"$_id.{field}" for field in PROGRESS_KEY},
+            "sessions": 1,
+            "first_session": 1,
+            "last_session": 1,
+        }},
+        # $merge "on" needs the unique (user_id, language, topic) index from ensure_indexes()
+        {"$merge": {
+            "into": into,
+            "on": list(PROGRESS_KEY),
+            "whenMatched": [{"$set": {
+                "sessions": "$$new.sessions",
+                "first_session": "$$new.first_session",
+                "last_session": "$$new.last_session",
+            }}],
+            "whenNotMatched": "insert",
+        }},
+    ]
+
+
+async def backfill(database):
+    await database.ensure_indexes()
+    logger.info("Rebuilding progress rollups from %s.sessions", database.db.name)
+    cursor = await database.sessions.aggregate(backfill_pipeline(database.progress.name), allowDiskUse=True)
+    await cursor.to_list(None)
+    logger.info("Progress rollups rebuilt: %d documents", await database.progress.count_documents({}))
+
+
+async def _run(args):
+    database = Database.connect(os.getenv("MONGO_URI"))
+    try:
+        if args.command == "backfill":
+            await backfill(database)
+    finally:
+        await database.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the per-user progress rollups")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("backfill", help="build the rollups from every stored session")
+    args = parser.parse_args()
+
+    load_dotenv()
+    configure_logging(fmt="%(asctime)s [%(levelname)s] %(message)s")
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Pre-serialized, ETag-tagged responses for the static catalog endpoints
+# /languages and /docs-source answers are encoded to bytes once (orjson) and
+# served as-is with a strong ETag and Cache-Control; a matching If-None-Match
+# gets an empty 304. The ETag belongs to the cached entry, so /docs-source
+# still does its (in-memory) table lookup first and compares If-None-Match
+# after it - a 304 only skips serialization and the body, not the lookup.
+# Both vary on X-API-Key, so a shared cache never hands a stored answer to a
+# request with a different (or no) key. The /docs-source table is rebuilt
+# whenever the source registry swaps in a new snapshot, the /languages body
+# whenever the `languages` list is replaced (i.e. languages.py is reloaded).
+import hashlib
+import os
+
+import orjson
+from fastapi import Request, Response
+
+import languages as languages_module
+
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, max-age=300")
+
+
+class CachedPayload:
+    """A JSON body serialized once, plus its strong ETag"""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, payload):
+        self.body = orjson.dumps(payload)
+        self.etag = '"%s"' % hashlib.blake2b(self.body, digest_size=16).hexdigest()
+
+
+def etag_matches(request: Request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    return any(tag.strip().replace("W/", "", 1) == etag for tag in header.split(","))
+
+
+def cached_response(request: Request, cached: CachedPayload, cache_control=CATALOG_CACHE_CONTROL):
+    headers = {"ETag": cached.etag, "Cache-Control": cache_control, "Vary": "X-API-Key"}
+    if etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+class LanguagesCache:
+    def __init__(self):
+        self._source = None
+        self._cached = None
+
+    def get(self):
+        current = languages_module.languages
+        if current is not self._source:
+            self._cached = CachedPayload({"languages": current})
+            self._source = current
+        return self._cached
+
+
+class DocsSourceCache:
+    """{"url": ...} bodies for every (language, topic) of the current source snapshot"""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._version = None
+        self._table = {}
+
+    def _rebuild(self, snapshot):
+        table = {}
+        for language, topics in snapshot.index.items():
+            if not topics:
+                continue
+            payloads = {topic: CachedPayload({"url": url}) for topic, url in topics.items() if url}
+            table[language] = (payloads, payloads.get("default"))
+        self._table = table
+        self._version = snapshot.version
+
+    def resolve(self, language, topic="default"):
+        """(language known?, CachedPayload or None) with the same default fallback as the registry"""
+        snapshot = self.registry.current()
+        if snapshot.version != self._version:
+            self._rebuild(snapshot)
+        entry = self._table.get(language.lower())
+        if entry is None:
+            return False, None
+        payloads, default = entry
+        return True, payloads.get(topic.lower()) or default
@@ -1,59 +1,30 @@
 import logging
-import requests
-from bs4 import BeautifulSoup
 
-# Set up python logging configs
-logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+from chunker import DEFAULT_MAX_CHARS, charset_of, stream_chunks
+from corpus import assemble, default_seeds, save_page
+from crawler import FETCHED, Crawler
+from log_config import configure_logging
+from search_index import build_index, page_records
+
 logger = logging.getLogger(__name__)
 
-# scrape MDN JavaScript pages
-def scrape_mdn_js():
-    url = "https://developer.mozilla.org/en-US/docs/Web/JavaScript"
-    logger.debug(f"Attempting to fetch URL: {url}")
-    
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        logger.debug(f"Successfully fetched URL: {url} with status code {response.status_code}")
-    except requests.exceptions.HTTPError as e:
-        logger.warning(f"HTTP error occurred: {e}")
-        return None
-    except requests.exceptions.RequestException as e:
-        logger.critical(f"Network-related error fetching the page: {e}")
-        return None
-    
-    soup = BeautifulSoup(response.content, 'html.parser')
-    title = soup.title.string if soup.title else "No Title"
-    logger.info(f"Page Title: {title}")
-    return soup
-
-# Function to chunk content (e.g., extract paragraphs and headers)
-def chunk_content(soup):
-    if not soup:
-        logger.error("No soup to process!")
+# Function to chunk a page - headings and text in document order, one pass
+def chunk_content(html, content_type=None, max_chars=DEFAULT_MAX_CHARS):
+    if not html:
+        logger.error("No page to process!")
         return []
-    
-    paragraphs = soup.find_all('p')
-    headers = soup.find_all(['h1', 'h2'])
-
-    logger.debug(f"Found {len(headers)} headers and {len(paragraphs)} paragraphs.")
-    
-    chunks = []
-    for header in headers:
-        text = header.get_text().strip()
-        if not text:
-            logger.warning("Empty header found.")
-        chunks.append(f"Header: {text}")
-    
-    for paragraph in paragraphs:
-        text = paragraph.get_text().strip()
-        if text:
-            chunks.append(text)
-        else:
-            logger.warning("Empty paragraph found.")
 
+    chunks = [
+        {"section": list(chunk.section), "text": chunk.text, "heading": chunk.heading}
+        for chunk in stream_chunks(html, max_chars=max_chars, encoding=charset_of(content_type))
+    ]
+    logger.debug(f"Found {sum(c['heading'] for c in chunks)} headers and {len(chunks)} chunks.")
     return chunks
 
+# Flatten chunks to text lines for scraped_data.txt
+def chunk_lines(chunks):
+    return [f"Header: {c['text']}" if c["heading"] else c["text"] for c in chunks]
+
 # Clean chunks (text data)
 def clean_data(chunks):
     cleaned = [chunk.strip() for chunk in chunks if chunk.strip()]
@@ -70,17 +41,36 @@ def save_scraped_data(data, filename="scraped_data.txt"):
     except Exception as e:
         logger.critical(f"Failed to save data to {filename}: {e}")
 
+# Crawl every seed in language_sources.json, re-chunk the pages that changed,
+# then assemble the deduplicated corpus from every stored page
+def crawl_all(seeds=None):
+    if seeds is None:
+        seeds = default_seeds()
+    logger.info(f"Crawling {len(seeds)} documentation pages...")
+
+    with Crawler() as crawler:
+        for result in crawler.crawl(seeds):
+            if result.status != FETCHED:
+                continue
+            page_chunks = chunk_content(result.body, result.content_type)
+            logger.debug(f"{result.seed.url}: {len(page_chunks)} chunks")
+            save_page(result.seed, page_chunks)
+            crawler.commit(result)
+
+    return assemble(seeds)
+
 # Main testing
 def main():
+    # Set up python logging configs
+    configure_logging(fmt="%(asctime)s [%(levelname)s] %(message)s")
     logger.info("Starting scraping process...")
-    soup = scrape_mdn_js()
+    pages = crawl_all()
+    cleaned_chunks = clean_data([line for page in pages for line in chunk_lines(page["chunks"])])
 
-    if soup:
-        logger.info("Scraping completed. Chunking content...")
-        chunks = chunk_content(soup)
-        cleaned_chunks = clean_data(chunks)
+    if cleaned_chunks:
         logger.info(f"Sample Chunks:\n{cleaned_chunks[:5]}")
         save_scraped_data(cleaned_chunks)
+        build_index(page_records(pages))
     else:
         logger.error("Scraping failed!")
 
@@ -0,0 +1,308 @@
+# On-disk BM25 inverted index over the scraped chunks
+# the file is memory-mapped read-only, so every gunicorn worker shares the same
+# page-cache pages instead of loading a private copy. BM25 term scores are
+# precomputed at build time and each posting list is stored highest score
+# first, so a query only reads the top postings of each term. Every term also
+# gets one posting list per language for the language filter.
+#
+# build:  python search_index.py build [--out data/search.idx]
+import argparse
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from operator import itemgetter
+from pathlib import Path
+
+from log_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent / "data"
+INDEX_PATH = Path(os.getenv("SEARCH_INDEX_PATH", DATA_DIR / "search.idx"))
+
+MAGIC = b"LTSIDX01"
+# magic, byte order, doc count, key count, then (offset, length) of 6 sections
+_HEADER = struct.Struct("<8scxxxII12Q")
+_SECTIONS = ("docs", "doc_offsets", "postings", "keys", "key_offsets", "key_postings")
+_BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+# postings read per term; lists longer than this only contribute their top entries
+MAX_POSTINGS_PER_TERM = 8192
+
+_TOKEN = re.compile(r"[a-z0-9]+[+#]*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can for from has have how if in into is it its of on or "
+    "so such that the their then there these they this to was were what when which will "
+    "with you your".split()
+)
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _key(term, language=""):
+    return f"{language}\x1f{term}".encode()
+
+
+def page_records(pages):
+    """Indexable chunk records from assembled corpus pages (corpus.assemble)"""
+    for page in pages:
+        for chunk in page["chunks"]:
+            if chunk.get("heading"):
+                continue
+            yield {
+                "language": page["language"].lower(),
+                "topic": page["topic"],
+                "url": page["url"],
+                "section": chunk["section"],
+                "text": chunk["text"],
+            }
+
+
+def build_index(records, path=INDEX_PATH, k1=1.2, b=0.75):
+    """Write an index for chunk records (language, topic, url, section, text)
+
+    Written to a temp file and renamed into place, so running workers keep
+    their current mapping until they notice the new file.
+    """
+    start = time.perf_counter()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+
+    postings = {}  # term -> (doc ids, term frequencies)
+    doc_lengths = array("I")
+    doc_languages = []
+    with open(tmp, "wb") as out:
+        out.write(b"\0" * _HEADER.size)
+        sections = {}
+
+        docs_start = out.tell()
+        doc_offsets = array("Q", [0])
+        for record in records:
+            tokens = tokenize(" ".join(record["section"]) + " " + record["text"])
+            if not tokens:
+                continue
+            doc_id = len(doc_lengths)
+            doc_lengths.append(len(tokens))
+            doc_languages.append(record["language"])
+            for term, tf in Counter(tokens).items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array("I"), array("I"))
+                entry[0].append(doc_id)
+                entry[1].append(tf)
+            blob = json.dumps(record, separators=(",", ":")).encode()
+            out.write(blob)
+            doc_offsets.append(doc_offsets[-1] + len(blob))
+        sections["docs"] = (docs_start, out.tell() - docs_start)
+        sections["doc_offsets"] = _write_array(out, doc_offsets)
+
+        n_docs = len(doc_lengths)
+        avg_length = sum(doc_lengths) / n_docs if n_docs else 0.0
+        # global and per-language lists for every term, in whatever order they are written
+        key_meta = []
+        postings_start = _align(out)
+        for term, (ids, tfs) in postings.items():
+            idf = math.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            scored = sorted(
+                (
+                    (idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_lengths[d] / avg_length)), d)
+                    for d, tf in zip(ids, tfs)
+                ),
+                reverse=True,
+            )
+            by_language = {}
+            for score, d in scored:
+                by_language.setdefault(doc_languages[d], []).append((score, d))
+            key_meta.append((_key(term), _write_postings(out, postings_start, scored), len(scored)))
+            for language, subset in by_language.items():
+                key_meta.append((_key(term, language), _write_postings(out, postings_start, subset), len(subset)))
+        sections["postings"] = (postings_start, out.tell() - postings_start)
+
+        key_meta.sort(key=itemgetter(0))
+        keys_start = out.tell()
+        key_offsets = array("Q", [0])
+        for key, _, _ in key_meta:
+            out.write(key)
+            key_offsets.append(key_offsets[-1] + len(key))
+        sections["keys"] = (keys_start, out.tell() - keys_start)
+        sections["key_offsets"] = _write_array(out, key_offsets)
+        # (byte offset into postings, posting count) per key
+        sections["key_postings"] = _write_array(out, array("Q", (v for _, o, n in key_meta for v in (o, n))))
+
+        out.seek(0)
+        out.write(_HEADER.pack(MAGIC, _BYTE_ORDER, n_docs, len(key_meta),
+                               *(v for name in _SECTIONS for v in sections[name])))
+    os.replace(tmp, path)
+    logger.info("Built search index %s: %d chunks, %d terms, %d keys in %.1fs", path, n_docs,
+                len(postings), len(key_meta), time.perf_counter() - start)
+    return n_docs
+
+
+def _align(out, size=8):
+    pad = -out.tell() % size
+    if pad:
+        out.write(b"\0" * pad)
+    return out.tell()
+
+
+def _write_array(out, values):
+    start = _align(out)
+    values.tofile(out)
+    return start, out.tell() - start
+
+
+def _write_postings(out, postings_start, scored):
+    # doc ids (u32) then scores (f32) for one list
+    offset = out.tell() - postings_start
+    array("I", (d for _, d in scored)).tofile(out)
+    array("f", (s for s, _ in scored)).tofile(out)
+    return offset
+
+
+class SearchIndex:
+    """Read-only view over an index file; cheap to share between requests"""
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _HEADER.unpack_from(self._mm)
+        magic, byte_order, self.doc_count, self.key_count = header[:4]
+        if magic != MAGIC or byte_order != _BYTE_ORDER:
+            raise ValueError(f"{self.path} is not a search index for this platform")
+        view = memoryview(self._mm)
+        spans = dict(zip(_SECTIONS, zip(header[4::2], header[5::2])))
+        section = {name: view[start:start + length] for name, (start, length) in spans.items()}
+        self._docs = section["docs"]
+        self._doc_offsets = section["doc_offsets"].cast("Q")
+        self._postings = section["postings"]
+        self._keys = section["keys"]
+        self._key_offsets = section["key_offsets"].cast("Q")
+        self._key_postings = section["key_postings"].cast("Q")
+
+    def _lookup(self, key):
+        lo, hi = 0, self.key_count
+        offsets = self._key_offsets
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = self._keys[offsets[mid]:offsets[mid + 1]].tobytes()
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return self._key_postings[2 * mid], self._key_postings[2 * mid + 1]
+        return None
+
+    def doc(self, doc_id):
+        return json.loads(self._docs[self._doc_offsets[doc_id]:self._doc_offsets[doc_id + 1]].tobytes())
+
+    def search(self, query, language=None, limit=10, max_postings=MAX_POSTINGS_PER_TERM):
+        """Top `limit` chunks for a free-text query as (score, record) pairs"""
+        scope = (language or "").lower()
+        lists = []
+        for term in dict.fromkeys(tokenize(query)):
+            found = self._lookup(_key(term, scope))
+            if found:
+                lists.append(found)
+        if not lists:
+            return []
+
+        scores = {}
+        # rarest terms first - their lists are short and carry the most weight
+        for offset, count in sorted(lists, key=itemgetter(1)):
+            n = min(count, max_postings)
+            ids = self._postings[offset:offset + 4 * n].cast("I")
+            weights = self._postings[offset + 4 * count:offset + 4 * (count + n)].cast("f")
+            if not scores:
+                scores = dict(zip(ids, weights))
+                continue
+            get = scores.get
+            for doc_id, weight in zip(ids, weights):
+                scores[doc_id] = get(doc_id, 0.0) + weight
+
+        top = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        return [(score, self.doc(doc_id)) for doc_id, score in top]
+
+
+class IndexHolder:
+    """Process-wide handle that reopens the index when the file is replaced"""
+
+    def __init__(self, path=INDEX_PATH, check_interval=5.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._index = None
+        self._stat_key = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        """The latest SearchIndex, or None when no index has been built yet"""
+        now = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self.check_interval
+                self._maybe_reopen()
+            finally:
+                self._lock.release()
+        return self._index
+
+    def _maybe_reopen(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key == self._stat_key:
+            return
+        try:
+            # the old mapping is released once no request holds it any more
+            self._index = SearchIndex(self.path)
+            self._stat_key = key
+            logger.info("Opened search index %s (%d chunks)", self.path, self._index.doc_count)
+        except (OSError, ValueError, struct.error) as e:
+            logger.error("Could not open search index %s: %s", self.path, e)
+
+
+# Shared by every request in this worker process
+search_index = IndexHolder()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the chunk search index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index the deduplicated chunks saved by scraping.py")
+    build.add_argument("--out", default=INDEX_PATH, type=Path)
+    query = sub.add_parser("query", help="run one query against a built index")
+    query.add_argument("q")
+    query.add_argument("--language")
+    query.add_argument("--index", default=INDEX_PATH, type=Path)
+    args = parser.parse_args()
+
+    configure_logging(fmt="%(asctime)s [%(levelname)s] %(message)s")
+    if args.command == "build":
+        # the crawler side stays out of the API workers that import this module
+        from corpus import assemble
+
+        build_index(page_records(assemble()), args.out)
+    else:
+        for score, record in SearchIndex(args.index).search(args.q, args.language):
+            print(f"{score:6.2f}  [{record['language']}] {record['url']}  {' > '.join(record['section'])}")
+            print(f"        {record['text'][:120]}")
+
+
+if __name__ == "__main__":
+    main()
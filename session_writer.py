@@ -0,0 +1,228 @@
+# Session inserts, either straight through (sync) or write-behind
+# write-behind: the _id is generated here, the request returns right away and a
+# background task flushes queued documents with insert_many(ordered=False) once
+# a batch fills up or the flush window closes
+# either way, every stored session is then folded into its progress rollup; in
+# sync mode that update runs as a background task so the request doesn't wait
+# for a second round trip, and close() waits for the ones still running
+import asyncio
+import logging
+import os
+
+from bson.objectid import ObjectId
+from fastapi import Request
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from progress import progress_updates
+
+logger = logging.getLogger(__name__)
+
+SYNC = "sync"
+WRITE_BEHIND = "write_behind"
+
+_STOP = object()
+_DUPLICATE_KEY = 11000
+
+
+class WriteQueueFull(Exception):
+    """The write-behind queue stayed full for longer than enqueue_timeout"""
+
+
+class SessionWriter:
+    def __init__(self, collection, progress=None, mode=SYNC, batch_size=500, flush_interval=0.05,
+                 max_queue=10000, enqueue_timeout=0.5, max_retries=3):
+        if mode not in (SYNC, WRITE_BEHIND):
+            raise ValueError(f"Unknown session write mode: {mode!r}")
+        self.collection = collection
+        self.progress = progress
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self._queue = asyncio.Queue(maxsize=max_queue) if mode == WRITE_BEHIND else None
+        self._task = None
+        self._closed = False
+        # sync-mode rollup updates still in flight
+        self._rollups = set()
+        # inserts between the _closed check and their put landing in the queue
+        self._enqueuing = 0
+        self._enqueued = asyncio.Event()
+        self._enqueued.set()
+
+    @classmethod
+    def from_env(cls, collection, progress=None):
+        return cls(
+            collection,
+            progress,
+            mode=os.getenv("SESSION_WRITE_MODE", SYNC),
+            batch_size=int(os.getenv("SESSION_BATCH_SIZE", "500")),
+            flush_interval=int(os.getenv("SESSION_FLUSH_INTERVAL_MS", "50")) / 1000,
+            max_queue=int(os.getenv("SESSION_QUEUE_SIZE", "10000")),
+            enqueue_timeout=int(os.getenv("SESSION_ENQUEUE_TIMEOUT_MS", "500")) / 1000,
+        )
+
+    @property
+    def write_behind(self):
+        return self.mode == WRITE_BEHIND
+
+    def start(self):
+        if self.write_behind and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Session write-behind enabled (batch %d, window %.0fms, queue %d)",
+                        self.batch_size, self.flush_interval * 1000, self._queue.maxsize)
+
+    async def insert(self, doc):
+        """Store one session document and return its _id
+
+        In write-behind mode this only waits for queue space; when the queue
+        stays full for enqueue_timeout it raises WriteQueueFull (backpressure).
+        """
+        if not self.write_behind:
+            result = await self.collection.insert_one(doc)
+            self._record_progress_later([doc])
+            return result.inserted_id
+
+        if self._closed:
+            raise WriteQueueFull("Session writer is shutting down")
+        doc.setdefault("_id", ObjectId())
+        self._enqueuing += 1
+        self._enqueued.clear()
+        try:
+            await asyncio.wait_for(self._queue.put(doc), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            raise WriteQueueFull(f"Session write queue full ({self._queue.maxsize} pending)")
+        finally:
+            self._enqueuing -= 1
+            if not self._enqueuing:
+                self._enqueued.set()
+        return doc["_id"]
+
+    async def insert_many(self, docs):
+        """Store several session documents; returns an (_id, error or None) pair per document
+
+        Sync mode writes them with one insert_many(ordered=False), so one bad
+        document doesn't stop the rest. Write-behind mode queues them; once the
+        queue is full, the remaining documents are reported as rejected.
+        """
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+
+        if not self.write_behind:
+            errors = {}
+            try:
+                await self.collection.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                errors = {err["index"]: err.get("errmsg", "write failed") for err in e.details.get("writeErrors", [])}
+            self._record_progress_later([doc for i, doc in enumerate(docs) if i not in errors])
+            return [(doc["_id"], errors.get(i)) for i, doc in enumerate(docs)]
+
+        results = []
+        for i, doc in enumerate(docs):
+            try:
+                results.append((await self.insert(doc), None))
+            except WriteQueueFull as e:
+                results += [(rest["_id"], str(e)) for rest in docs[i:]]
+                break
+        return results
+
+    async def close(self):
+        """Stop accepting writes, flush whatever is still queued and finish pending rollups"""
+        self._closed = True
+        if self._task is not None:
+            # let accepted inserts finish enqueueing so the stop marker lands behind them
+            await self._enqueued.wait()
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+            logger.info("Session write-behind queue flushed")
+        if self._rollups:
+            await asyncio.gather(*self._rollups)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            doc = await self._queue.get()
+            if doc is _STOP:
+                break
+            batch = [doc]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    doc = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        doc = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if doc is _STOP:
+                    stopping = True
+                    break
+                batch.append(doc)
+            await self._flush_logged(batch)
+
+        # anything that still got in behind the stop marker
+        leftover = []
+        while not self._queue.empty():
+            doc = self._queue.get_nowait()
+            if doc is not _STOP:
+                leftover.append(doc)
+        for start in range(0, len(leftover), self.batch_size):
+            await self._flush_logged(leftover[start:start + self.batch_size])
+
+    async def _flush_logged(self, batch):
+        try:
+            await self._flush(batch)
+        except Exception:
+            # keep the flusher alive - a dead task would silently fill the queue
+            logger.exception("Unexpected error flushing %d queued sessions", len(batch))
+
+    async def _flush(self, batch):
+        # _ids are assigned before queueing, so a retry after a partial insert
+        # only produces duplicate-key errors for the documents that already landed
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await self.collection.insert_many(batch, ordered=False)
+                logger.debug("Flushed %d queued sessions", len(batch))
+                await self._record_progress(batch)
+                return
+            except BulkWriteError as e:
+                errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != _DUPLICATE_KEY]
+                if errors:
+                    logger.error("Dropped %d of %d queued sessions: %s", len(errors), len(batch), errors[0].get("errmsg"))
+                # duplicates landed on an earlier attempt and haven't been counted yet
+                dropped = {err["index"] for err in errors}
+                await self._record_progress([doc for i, doc in enumerate(batch) if i not in dropped])
+                return
+            except PyMongoError as e:
+                if attempt == self.max_retries:
+                    logger.error("Dropped %d queued sessions after %d attempts: %s", len(batch), attempt, e)
+                    return
+                logger.warning("Flushing %d queued sessions failed (attempt %d): %s", len(batch), attempt, e)
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+    def _record_progress_later(self, docs):
+        if self.progress is None or not docs:
+            return
+        task = asyncio.create_task(self._record_progress(docs))
+        self._rollups.add(task)
+        task.add_done_callback(self._rollups.discard)
+
+    async def _record_progress(self, docs):
+        # the sessions are already stored, so a failed rollup update is only
+        # logged - `python progress.py backfill` rebuilds the counts
+        if self.progress is None or not docs:
+            return
+        try:
+            await self.progress.bulk_write(progress_updates(docs), ordered=False)
+        except PyMongoError as e:
+            logger.error("Could not update progress for %d sessions: %s", len(docs), e)
+
+
+async def get_session_writer(request: Request) -> SessionWriter:
+    """FastAPI dependency - the SessionWriter owned by this worker's lifespan"""
+    return request.app.state.session_writer
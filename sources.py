@@ -0,0 +1,125 @@
+# Process-wide registry for language_sources.json
+# loads once, keeps a lowercase (language, topic) index and only re-reads the
+# file when its mtime/size changes AND the content hash is actually different
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SOURCES_PATH = Path(__file__).parent / "language_sources.json"
+
+
+def validate_sources(sources):
+    """Raise ValueError unless `sources` is {language: {topic: url}} with string keys and values"""
+    if not isinstance(sources, dict):
+        raise ValueError(f"expected an object of languages, got {type(sources).__name__}")
+    for language, topics in sources.items():
+        if not isinstance(topics, dict):
+            raise ValueError(f"{language!r}: expected an object of topics, got {type(topics).__name__}")
+        for topic, url in topics.items():
+            if not isinstance(url, str):
+                raise ValueError(f"{language!r}/{topic!r}: expected a URL string, got {type(url).__name__}")
+
+
+class SourceSnapshot:
+    """One immutable, fully built version of the sources file"""
+
+    __slots__ = ("sources", "index", "digest", "version")
+
+    def __init__(self, sources, digest, version):
+        validate_sources(sources)
+        self.sources = sources
+        self.digest = digest
+        self.version = version
+        # {language_lower: {topic_lower: url}} - built once, never mutated
+        self.index = {
+            language.lower(): {topic.lower(): url for topic, url in topics.items()}
+            for language, topics in sources.items()
+        }
+
+    def topics_for(self, language):
+        """Topic -> URL map for a language, or None if the language is unknown"""
+        return self.index.get(language.lower())
+
+    def resolve(self, language, topic="default"):
+        """URL for (language, topic), falling back to the language default"""
+        topics = self.topics_for(language)
+        if topics is None:
+            return None
+        return topics.get(topic.lower()) or topics.get("default")
+
+
+class SourceRegistry:
+    """Hot-reloading holder of the current SourceSnapshot
+
+    Readers grab `current()` and keep using that object; a reload builds a new
+    snapshot off to the side and swaps the reference in one assignment, so a
+    request never sees a half-loaded index.
+    """
+
+    def __init__(self, path=SOURCES_PATH, check_interval=1.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._stat_key = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Force a (re)load from disk - used at startup"""
+        with self._lock:
+            self._reload()
+        return self._snapshot
+
+    def current(self):
+        """Latest snapshot, re-checking the file at most once per check_interval"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.load()
+
+        now = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            # only one thread checks; everyone else keeps serving the old snapshot
+            try:
+                self._next_check = now + self.check_interval
+                self._maybe_reload()
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    def _maybe_reload(self):
+        try:
+            stat = self.path.stat()
+        except OSError as e:
+            logger.error("Cannot stat %s, keeping current sources: %s", self.path, e)
+            return
+        if (stat.st_mtime_ns, stat.st_size) != self._stat_key:
+            try:
+                self._reload()
+            except Exception as e:
+                # half-written file, bad JSON or wrong shape - keep serving the last good version
+                logger.error("Reloading %s failed, keeping current sources: %s", self.path, e)
+
+    def _reload(self):
+        stat = self.path.stat()
+        raw = self.path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        self._stat_key = (stat.st_mtime_ns, stat.st_size)
+
+        current = self._snapshot
+        if current is not None and current.digest == digest:
+            logger.debug("Language sources touched but unchanged (%s)", digest[:12])
+            return
+
+        version = current.version + 1 if current is not None else 1
+        snapshot = SourceSnapshot(json.loads(raw), digest, version)
+        self._snapshot = snapshot
+        logger.info("Loaded language sources v%d from %s (%s)", version, self.path, digest[:12])
+
+
+# Shared by every request in this worker process
+source_registry = SourceRegistry()
@@ -6,5 +6,10 @@ python3 -m pip install --upgrade pip
 # Install dependencies from requirements.txt
 pip install -r requirements.txt
 
+# Workers share their metrics through this directory; clear out the last run's
+export METRICS_DIR="${METRICS_DIR:-/tmp/language-tutor-metrics}"
+rm -rf "$METRICS_DIR"
+mkdir -p "$METRICS_DIR"
+
 # Start the app with Gunicorn
 gunicorn -w 4 -k uvicorn.workers.UvicornWorker main:app
@@ -0,0 +1,26 @@
+# Streaming chunker block handling
+import pytest
+
+from chunker import stream_chunks
+
+
+def texts(html):
+    return [chunk.text for chunk in stream_chunks(html, max_chars=None)]
+
+
+@pytest.mark.parametrize("html, expected", [
+    ("<ul><li>one<p>inner para</p>tail</li></ul>", ["one", "inner para", "tail"]),
+    ("<dl><dd><p>def</p> extra</dd></dl>", ["def", "extra"]),
+    ("<table><tr><td>x <p>y</p> z</td></tr></table>", ["x", "y", "z"]),
+])
+def test_text_after_a_nested_paragraph_is_kept(html, expected):
+    assert texts(html) == expected
+
+
+def test_unclosed_paragraphs():
+    assert texts("<p>a<p>b") == ["a", "b"]
+    assert texts("<li><p>a</li><p>after</p>") == ["a", "after"]
+
+
+def test_nested_blocks_are_space_separated():
+    assert texts("<li>one<ul><li>two</li></ul>three</li>") == ["one two three"]
@@ -0,0 +1,41 @@
+# Corpus assembly: dedup across stored pages, independent of crawl order
+from corpus import assemble, save_page
+from crawler import Seed
+
+SHARED = "The event loop runs one task at a time and switches between them at every await point."
+
+
+def chunk(text):
+    return {"section": ["Intro"], "text": text, "heading": False}
+
+
+def texts(pages):
+    return {page["url"]: [c["text"] for c in page["chunks"]] for page in pages}
+
+
+def test_shared_chunk_belongs_to_the_first_seed(tmp_path):
+    a = Seed("python", "default", "http://docs.test/a")
+    b = Seed("python", "asyncio", "http://docs.test/b")
+    # stored in the opposite order to the seeds, as a crawl might finish them
+    save_page(b, [chunk(SHARED), chunk("Tasks wrap coroutines so the loop can schedule them concurrently.")], tmp_path)
+    save_page(a, [chunk("Python is a general purpose programming language with batteries included."),
+                  chunk(SHARED)], tmp_path)
+
+    corpus = texts(assemble([a, b], tmp_path))
+
+    assert SHARED in corpus[a.url]
+    assert SHARED not in corpus[b.url]
+
+
+def test_shared_chunk_survives_when_its_owner_drops_it(tmp_path):
+    a = Seed("python", "default", "http://docs.test/a")
+    b = Seed("python", "asyncio", "http://docs.test/b")
+    save_page(a, [chunk(SHARED)], tmp_path)
+    save_page(b, [chunk(SHARED)], tmp_path)
+    assert texts(assemble([a, b], tmp_path))[b.url] == []
+
+    # a changes and loses the text; b is unchanged (a 304) and is not re-saved
+    save_page(a, [chunk("The standard library documentation was reorganised into smaller topic pages.")], tmp_path)
+
+    assert texts(assemble([a, b], tmp_path))[b.url] == [SHARED]
+
@@ -0,0 +1,89 @@
+# Offline crawler tests against the local documentation stand-in
+# run from the repo root:  python -m pytest -q
+import socket
+
+import pytest
+
+from benchmarks.docs_server import DocsServer, make_page
+from crawler import FAILED, FETCHED, NOT_MODIFIED, Crawler, Seed
+
+
+def seeds_for(server, paths):
+    return [Seed("lang", f"topic{n}", server.base_url + path) for n, path in enumerate(paths)]
+
+
+def crawl(seeds, cache_path, commit=True, **options):
+    options.setdefault("backoff", 0)
+    with Crawler(cache_path=cache_path, **options) as crawler:
+        results = {}
+        for result in crawler.crawl(seeds):
+            if commit:
+                crawler.commit(result)
+            results[result.seed.url] = result
+        return results
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "crawl_cache.json"
+
+
+def test_recrawl_gets_304_for_unchanged_pages(cache_path):
+    pages = {f"/docs/{n}": make_page(f"Page {n}", sections=2) for n in range(3)}
+    with DocsServer(pages) as server:
+        seeds = seeds_for(server, pages)
+        first = crawl(seeds, cache_path)
+        again = crawl(seeds, cache_path)
+
+        assert {r.status for r in first.values()} == {FETCHED}
+        assert first[seeds[0].url].body == pages["/docs/0"]
+        assert {r.status for r in again.values()} == {NOT_MODIFIED}
+        assert server.not_modified == len(pages)
+
+
+def test_validators_need_a_commit(cache_path):
+    pages = {"/docs/0": make_page("Page", sections=1)}
+    with DocsServer(pages) as server:
+        seeds = seeds_for(server, pages)
+        crawl(seeds, cache_path, commit=False)
+        again = crawl(seeds, cache_path)
+
+        # the page was never stored, so it must be downloaded again
+        assert again[seeds[0].url].status == FETCHED
+        assert server.not_modified == 0
+
+
+def test_503_is_retried_until_it_succeeds(cache_path):
+    pages = {"/docs/0": make_page("Flaky", sections=1)}
+    with DocsServer(pages, flaky={"/docs/0": 2}) as server:
+        seeds = seeds_for(server, pages)
+        results = crawl(seeds, cache_path, retries=3)
+
+        assert results[seeds[0].url].status == FETCHED
+        assert server.hits == 3
+
+
+def test_per_host_cap(cache_path):
+    pages = {f"/docs/{n}": make_page(f"Page {n}", sections=1) for n in range(12)}
+    with DocsServer(pages, delay=0.05) as server:
+        results = crawl(seeds_for(server, pages), cache_path, max_workers=12, per_host=2)
+
+        assert {r.status for r in results.values()} == {FETCHED}
+        assert server.max_in_flight == 2
+
+
+def test_404_and_connection_failure_are_failed(cache_path):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed_port = s.getsockname()[1]
+
+    with DocsServer({}) as server:
+        missing = Seed("lang", "missing", server.base_url + "/docs/missing")
+        refused = Seed("lang", "refused", f"http://127.0.0.1:{closed_port}/docs")
+        results = crawl([missing, refused], cache_path, retries=1)
+
+    assert results[missing.url].status == FAILED
+    assert results[missing.url].http_status == 404
+    assert results[refused.url].status == FAILED
+    assert results[refused.url].http_status is None
+    assert results[refused.url].error
@@ -0,0 +1,46 @@
+# /metrics merging the snapshots every gunicorn worker writes to METRICS_DIR
+import json
+import os
+import subprocess
+import sys
+
+import metrics
+from metrics import Gauge, Histogram
+
+
+def exited_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_workers_are_merged_and_dead_gauges_dropped(tmp_path, monkeypatch):
+    latency = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    in_flight = Gauge("in_flight", "In flight.", ())
+    monkeypatch.setattr(metrics, "METRICS", [latency, in_flight])
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+
+    latency.observe(0.05, "/a")
+    in_flight.inc()
+    # one live sibling worker and one that has since exited
+    for pid in (os.getppid(), exited_pid()):
+        (tmp_path / f"{pid}.json").write_text(json.dumps({
+            "latency_seconds": [[["/a"], [0, 1, 1, 0.5]]],
+            "in_flight": [[[], 2]],
+        }))
+
+    lines = metrics.render_metrics().splitlines()
+
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in lines
+    assert "in_flight 3" in lines
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+
+def test_without_metrics_dir_only_this_worker_is_reported(monkeypatch):
+    in_flight = Gauge("in_flight", "In flight.", ("method",))
+    monkeypatch.setattr(metrics, "METRICS", [in_flight])
+    monkeypatch.setattr(metrics, "METRICS_DIR", None)
+    in_flight.inc("GET")
+    assert 'in_flight{method="GET"} 1' in metrics.render_metrics().splitlines()
@@ -0,0 +1,51 @@
+# SessionWriter against the in-process Mongo stand-in
+import asyncio
+
+from benchmarks.fake_mongo import FakeCollection
+from session_writer import WRITE_BEHIND, SessionWriter
+
+
+def session(n):
+    return {"user_id": f"user-{n}", "language": "python", "topic": "default", "timestamp": n}
+
+
+def test_close_flushes_everything_queued():
+    async def scenario():
+        sessions = FakeCollection()
+        writer = SessionWriter(sessions, mode=WRITE_BEHIND, batch_size=3)
+        writer.start()
+        ids = [await writer.insert(session(n)) for n in range(10)]
+        await writer.close()
+        return sessions, ids
+
+    sessions, ids = asyncio.run(scenario())
+    assert set(sessions.docs) == set(ids)
+
+
+def test_close_keeps_an_insert_that_is_still_enqueueing():
+    async def scenario():
+        sessions = FakeCollection()
+        writer = SessionWriter(sessions, mode=WRITE_BEHIND)
+        writer.start()
+        pending = asyncio.create_task(writer.insert(session(1)))
+        await asyncio.sleep(0)  # past the _closed check, put not yet done
+        await writer.close()
+        return sessions, writer, await pending
+
+    sessions, writer, session_id = asyncio.run(scenario())
+    assert session_id in sessions.docs
+    assert writer._queue.empty()
+
+
+def test_sync_insert_returns_before_the_rollup_and_close_finishes_it():
+    async def scenario():
+        sessions, progress = FakeCollection(), FakeCollection(latency=0.05)
+        writer = SessionWriter(sessions, progress)
+        await writer.insert(session(1))
+        pending = len(progress.docs)
+        await writer.close()
+        return pending, progress
+
+    pending, progress = asyncio.run(scenario())
+    assert pending == 0
+    assert len(progress.docs) == 1
@@ -0,0 +1,25 @@
+# Hot reload of language_sources.json keeps the last good version on bad edits
+import json
+import os
+
+import pytest
+
+from sources import SourceRegistry
+
+
+def write(path, data, mtime):
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.mark.parametrize("bad", [[1, 2], {"python": ["https://docs.python.org/3/"]}, {"python": {"default": 3}}])
+def test_wrong_shape_keeps_the_last_good_version(tmp_path, bad):
+    path = tmp_path / "language_sources.json"
+    write(path, {"python": {"default": "https://docs.python.org/3/"}}, 1_000_000_000)
+    registry = SourceRegistry(path, check_interval=0)
+    first = registry.load()
+
+    write(path, bad, 2_000_000_000)
+
+    assert registry.current() is first
+    assert registry.current().resolve("python") == "https://docs.python.org/3/"